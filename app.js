@@ -325,8 +325,9 @@ class KLUAgent {
         const firstUserMsg = this.currentMessages.find(m => m.role === 'user');
         const title = firstUserMsg ? firstUserMsg.content.substring(0, 50) + (firstUserMsg.content.length > 50 ? '...' : '') : 'New Chat';
 
-        if (!this.currentConversationId) {
-            this.currentConversationId = 'conv_' + Date.now();
+        const existing = this.conversations.find(c => c.id === this.currentConversationId);
+        if (!existing) {
+            this.currentConversationId = this.currentConversationId || 'conv_' + Date.now();
             this.conversations.push({
                 id: this.currentConversationId,
                 title: title,
@@ -334,11 +335,8 @@ class KLUAgent {
                 createdAt: new Date().toISOString()
             });
         } else {
-            const conv = this.conversations.find(c => c.id === this.currentConversationId);
-            if (conv) {
-                conv.messages = [...this.currentMessages];
-                conv.title = title;
-            }
+            existing.messages = [...this.currentMessages];
+            existing.title = title;
         }
 
         localStorage.setItem('klu_conversations', JSON.stringify(this.conversations));
@@ -364,17 +362,34 @@ class KLUAgent {
         this.sendBtn.disabled = true;
         this.autoResizeInput();
 
+        // The backend keys conversation memory by this ID, so assign it before the first request
+        if (!this.currentConversationId) {
+            this.currentConversationId = 'conv_' + Date.now();
+        }
+
         // Show typing indicator
         this.isProcessing = true;
         this.showTypingIndicator();
 
-        // Simulate AI response
-        const response = await this.generateResponse(text);
+        // Stream the AI response into a live bubble as tokens arrive
+        let liveBubble = null;
+        const response = await this.generateResponse(text, {
+            onStatus: (status) => this.setTypingStatus(status),
+            onToken: (partialText) => {
+                if (!liveBubble) {
+                    this.hideTypingIndicator();
+                    liveBubble = this.appendStreamingMessage();
+                }
+                liveBubble.innerHTML = this.renderMarkdown(partialText);
+                this.scrollToBottom();
+            }
+        });
 
-        // Remove typing indicator and add response
+        // Replace the live bubble (or typing indicator) with the final message
         this.hideTypingIndicator();
+        if (liveBubble) liveBubble.closest('.message').remove();
         this.currentMessages.push({ role: 'bot', content: response.text });
-        this.appendMessage('bot', response.text, true, response.source);
+        this.appendMessage('bot', response.text, !liveBubble, response.source);
 
         this.isProcessing = false;
         this.saveConversation();
@@ -416,20 +431,129 @@ class KLUAgent {
         this.scrollToBottom();
     }
 
+    appendStreamingMessage() {
+        const messageDiv = document.createElement('div');
+        messageDiv.className = 'message bot fade-in';
+        messageDiv.innerHTML = `
+            <div class="message-avatar">
+                <i class="fas fa-robot"></i>
+            </div>
+            <div class="message-content">
+                <div class="message-bubble"></div>
+            </div>
+        `;
+        this.messagesWrapper.appendChild(messageDiv);
+        this.scrollToBottom();
+        return messageDiv.querySelector('.message-bubble');
+    }
+
+    // ==========================================
+    // Streaming Response (Server-Sent Events)
+    // ==========================================
+    async streamResponse(API_URL, query, handlers = {}) {
+        const response = await fetch(`${API_URL}/api/chat/stream`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Accept': 'text/event-stream' },
+            body: JSON.stringify({ message: query, conversation_id: this.currentConversationId })
+        });
+
+        if (!response.ok || !response.body) {
+            throw new Error(`Stream request failed with status ${response.status}`);
+        }
+
+        // Past this point the server has the request: failures are marked so the
+        // caller reports them instead of re-running the whole agent via /api/chat
+        try {
+            return await this.readStream(response, handlers);
+        } catch (err) {
+            err.streamOpened = true;
+            throw err;
+        }
+    }
+
+    async readStream(response, handlers) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let answer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            // SSE frames are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let event = 'message';
+                let data = '';
+                for (const line of frame.split('\n')) {
+                    if (line.startsWith('event:')) event = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                }
+                const payload = data ? JSON.parse(data) : {};
+
+                if (event === 'tool_start') {
+                    handlers.onStatus?.(`Checking ${payload.tool}...`);
+                } else if (event === 'tool_end') {
+                    handlers.onStatus?.(`${payload.tool} done (${payload.elapsed}s)`);
+                } else if (event === 'token') {
+                    answer += payload.text;
+                    handlers.onToken?.(answer);
+                } else if (event === 'reset') {
+                    // The agent failed mid-answer: the fallback answer replaces the partial one
+                    answer = '';
+                    handlers.onToken?.(answer);
+                } else if (event === 'done') {
+                    return payload;
+                } else if (event === 'error') {
+                    throw new Error(payload.detail);
+                }
+            }
+        }
+
+        throw new Error('Stream ended before the answer was complete');
+    }
+
     // ==========================================
     // AI Response Generation (Backend API + Local Fallback)
     // ==========================================
-    async generateResponse(query) {
-        // Try backend API first
+    async generateResponse(query, handlers = {}) {
+        const API_URL = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1'
+            ? 'http://localhost:8000'
+            : window.location.origin;
+
+        // Try the streaming endpoint first
         try {
-            const API_URL = window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1'
-                ? 'http://localhost:8000'
-                : window.location.origin;
+            const data = await this.streamResponse(API_URL, query, handlers);
+            const sources = data.sources && data.sources.length > 0
+                ? data.sources.join(', ')
+                : 'KLU Knowledge Base';
+            return {
+                text: data.answer,
+                source: `${sources} (${data.response_time}s)`
+            };
+        } catch (err) {
+            if (err.streamOpened) {
+                // The server already ran (and failed) the request: don't run it again
+                console.error('Chat stream failed:', err.message);
+                return {
+                    text: `Sorry, something went wrong while answering: ${err.message}. Please try again.`,
+                    source: 'KLU Agent (error)'
+                };
+            }
+            console.warn('Streaming unavailable, using /api/chat:', err.message);
+        }
 
+        // Then the regular backend API
+        try {
             const response = await fetch(`${API_URL}/api/chat`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: query })
+                body: JSON.stringify({ message: query, conversation_id: this.currentConversationId })
             });
 
             if (response.ok) {
@@ -507,6 +631,13 @@ class KLUAgent {
         this.scrollToBottom();
     }
 
+    setTypingStatus(status) {
+        this.typingStatus.innerHTML = `
+            <span class="status-dot online"></span>
+            ${this.escapeHTML(status)}
+        `;
+    }
+
     hideTypingIndicator() {
         this.typingStatus.innerHTML = `
             <span class="status-dot online"></span>
@@ -0,0 +1,114 @@
+"""
+KLU Agent - Metrics Callback Module
+LangChain callback handler feeding the /metrics histograms: LLM latency
+and token usage, tool latency, retriever latency and agent iterations.
+"""
+
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from metrics import AGENT_ITERATIONS, LLM_SECONDS, LLM_TOKENS, TOOL_SECONDS, VECTOR_SEARCH_SECONDS
+from rag.context import count_tokens
+import config
+
+
+def _token_usage(response):
+    """(prompt, completion) token counts reported by the provider, or None."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage.get("prompt_tokens") is not None:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                return metadata.get("input_tokens", 0), metadata.get("output_tokens", 0)
+    return None
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records per-stage timings into the process-wide metrics.
+
+    Pass one in the run config (config={"callbacks": [handler]}) so child
+    runs inherit it. With agent_run=True the handler belongs to a single
+    agent invocation and also records how many LLM steps it took.
+    """
+
+    # Bookkeeping is a few dict operations - no need to hop to a thread
+    run_inline = True
+
+    def __init__(self, agent_run: bool = False):
+        self.agent_run = agent_run
+        self.llm_calls = 0
+        self._runs = {}   # run_id -> (label, start, prompt chars)
+
+    # ----- LLM -----
+
+    def _llm_start(self, run_id, metadata, prompt_chars: int):
+        model = (metadata or {}).get("ls_model_name") or config.LLM_PROVIDER
+        if self.agent_run:
+            self.llm_calls += 1
+        self._runs[run_id] = (model, time.perf_counter(), prompt_chars)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, metadata=None, **kwargs):
+        self._llm_start(run_id, metadata, sum(len(prompt) for prompt in prompts))
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        chars = sum(len(str(message.content)) for batch in messages for message in batch)
+        self._llm_start(run_id, metadata, chars)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model, start, prompt_chars = run
+        LLM_SECONDS.observe(time.perf_counter() - start, model=model)
+
+        usage = _token_usage(response)
+        if usage is None:
+            # Provider did not report usage - estimate
+            completion = "".join(g.text for generations in response.generations for g in generations)
+            usage = ((prompt_chars + 3) // 4, count_tokens(completion))
+        LLM_TOKENS.inc(usage[0], model=model, kind="prompt")
+        LLM_TOKENS.inc(usage[1], model=model, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._runs.pop(run_id, None)
+
+    # ----- tools -----
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._runs[run_id] = (name, time.perf_counter(), 0)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            TOOL_SECONDS.observe(time.perf_counter() - run[1], tool=run[0])
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.on_tool_end(None, run_id=run_id)
+
+    # ----- retrievers -----
+
+    def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "retriever"
+        self._runs[run_id] = (name, time.perf_counter(), 0)
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            VECTOR_SEARCH_SECONDS.observe(time.perf_counter() - run[1], retriever=run[0])
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._runs.pop(run_id, None)
+
+    # ----- agent -----
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        if self.agent_run and parent_run_id is None:
+            AGENT_ITERATIONS.observe(self.llm_calls)
+
+
+# Shared handler for calls outside an agent run (retrievers inside tools, the router)
+metrics_callback = MetricsCallbackHandler()
@@ -6,13 +6,24 @@ Implements the LangChain Agent with tools for:
 3. FAQ lookup
 """
 
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain.tools import Tool
-from langchain.prompts import PromptTemplate
-from sqlalchemy import text as sql_text
-from data.database import SessionLocal, Course, Department, Event, HostelInfo, FAQ
-from rag.vector_store import get_retriever
-from rag.chain import get_llm
+import re
+import threading
+import time
+from langchain.agents import AgentExecutor, create_react_agent, create_tool_calling_agent
+from langchain.tools import StructuredTool, Tool
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder, PromptTemplate
+from sqlalchemy import func, text as sql_text
+from sqlalchemy.orm import contains_eager, joinedload
+from data.database import SessionLocal, Course, Department, Event, HostelInfo, FAQ, fts_search, load_in_order
+from agents.callbacks import MetricsCallbackHandler, metrics_callback
+from agents.tool_cache import cached_tool
+from rag.vector_store import get_retriever, index_building
+from rag.categories import CATEGORIES, canonical_category, infer_category
+from rag.context import assemble_context
+from rag.dedup import drop_redundant
+from rag.chain import get_llm, get_llm_config_key
+from metrics import AGENT_RUNS
+from workers import run_in_worker
 import config
 
 
@@ -20,16 +31,37 @@ import config
 # Agent Tools
 # ============================================
 
+def _split_category(query: str):
+    """Accept an explicit "category: question" input, otherwise infer the category."""
+    match = re.match(r"^\s*([A-Za-z_ ]+?)\s*:\s*(.+)$", query, re.DOTALL)
+    if match and canonical_category(match.group(1)):
+        return canonical_category(match.group(1)), match.group(2)
+    return infer_category(query), query
+
+
 def search_knowledge_base(query: str) -> str:
     """Search the KLU knowledge base using RAG for relevant information."""
-    retriever = get_retriever()
+    category, query = _split_category(query)
+    if index_building():
+        # Cold start: chat is open before the first index build finishes
+        return ("The knowledge base is still being indexed. Answer from the database tools if they "
+                "cover the question; otherwise ask the student to try again in a minute.")
+    retriever = get_retriever(category)
     if retriever is None:
         return "Knowledge base is not available."
 
-    docs = retriever.invoke(query)
+    # Tools run on the worker pool, outside the agent's callback context
+    run_config = {"callbacks": [metrics_callback]}
+    docs = retriever.invoke(query, config=run_config)
+    if not docs and category:
+        # The category guess was wrong (general chunks such as PDF pages are always included)
+        docs = get_retriever().invoke(query, config=run_config)
     if not docs:
         return "No relevant information found in the knowledge base."
 
+    docs, _ = drop_redundant(docs, config.REDUNDANCY_THRESHOLD)
+    docs = assemble_context(docs, query, label="SearchKnowledgeBase")
+
     results = []
     for i, doc in enumerate(docs, 1):
         source = doc.metadata.get("category", "general")
@@ -38,25 +70,40 @@ def search_knowledge_base(query: str) -> str:
     return "\n\n---\n\n".join(results)
 
 
+@cached_tool("QueryCourses")
 def query_courses(query: str) -> str:
     """Query the database for course information. Input should be a search term like department name, course level (UG/PG), or course name."""
     session = SessionLocal()
     try:
-        search_term = f"%{query}%"
-        courses = session.query(Course).join(Department).filter(
-            (Course.name.ilike(search_term)) |
-            (Department.name.ilike(search_term)) |
-            (Department.code.ilike(search_term)) |
-            (Course.level.ilike(search_term))
-        ).all()
+        course_ids = fts_search(session, "courses", query)
+        if course_ids is not None:
+            # Courses matching directly, then courses of matching departments
+            dept_ids = fts_search(session, "departments", query) or []
+            if dept_ids:
+                course_ids += [
+                    cid for (cid,) in session.query(Course.id).filter(Course.department_id.in_(dept_ids))
+                    if cid not in course_ids
+                ]
+            courses = load_in_order(session, Course, course_ids[:config.FTS_RESULT_LIMIT], joinedload(Course.department))
+        else:
+            search_term = f"%{query}%"
+            # The join already selects each course's department - populate the
+            # relationship from it instead of issuing one query per course
+            courses = session.query(Course).join(Course.department).options(
+                contains_eager(Course.department)
+            ).filter(
+                (Course.name.ilike(search_term)) |
+                (Department.name.ilike(search_term)) |
+                (Department.code.ilike(search_term)) |
+                (Course.level.ilike(search_term))
+            ).all()
 
         if not courses:
             return f"No courses found matching '{query}'."
 
         results = []
         for c in courses:
-            dept = session.query(Department).filter_by(id=c.department_id).first()
-            dept_name = dept.name if dept else "N/A"
+            dept_name = c.department.name if c.department else "N/A"
             results.append(
                 f"• {c.name} ({c.code})\n"
                 f"  Department: {dept_name}\n"
@@ -69,16 +116,21 @@ def query_courses(query: str) -> str:
         session.close()
 
 
+@cached_tool("QueryEvents")
 def query_events(query: str) -> str:
     """Query upcoming events at KLU. Input can be event type (tech/workshop/seminar/cultural) or general search term."""
     session = SessionLocal()
     try:
-        search_term = f"%{query}%"
-        events = session.query(Event).filter(
-            (Event.name.ilike(search_term)) |
-            (Event.event_type.ilike(search_term)) |
-            (Event.description.ilike(search_term))
-        ).filter(Event.is_upcoming == True).all()
+        event_ids = fts_search(session, "events", query, where="t.is_upcoming = 1")
+        if event_ids is not None:
+            events = load_in_order(session, Event, event_ids)
+        else:
+            search_term = f"%{query}%"
+            events = session.query(Event).filter(
+                (Event.name.ilike(search_term)) |
+                (Event.event_type.ilike(search_term)) |
+                (Event.description.ilike(search_term))
+            ).filter(Event.is_upcoming == True).all()
 
         if not events:
             return f"No upcoming events found matching '{query}'."
@@ -97,16 +149,21 @@ def query_events(query: str) -> str:
         session.close()
 
 
+@cached_tool("QueryHostel")
 def query_hostel(query: str) -> str:
     """Query hostel information. Input can be hostel type (boys/girls), room type, or general search."""
     session = SessionLocal()
     try:
-        search_term = f"%{query}%"
-        hostels = session.query(HostelInfo).filter(
-            (HostelInfo.hostel_name.ilike(search_term)) |
-            (HostelInfo.hostel_type.ilike(search_term)) |
-            (HostelInfo.room_type.ilike(search_term))
-        ).all()
+        hostel_ids = fts_search(session, "hostel_info", query)
+        if hostel_ids is not None:
+            hostels = load_in_order(session, HostelInfo, hostel_ids)
+        else:
+            search_term = f"%{query}%"
+            hostels = session.query(HostelInfo).filter(
+                (HostelInfo.hostel_name.ilike(search_term)) |
+                (HostelInfo.hostel_type.ilike(search_term)) |
+                (HostelInfo.room_type.ilike(search_term))
+            ).all()
 
         if not hostels:
             return f"No hostel information found matching '{query}'."
@@ -125,16 +182,21 @@ def query_hostel(query: str) -> str:
         session.close()
 
 
+@cached_tool("QueryFAQs")
 def query_faqs(query: str) -> str:
     """Search frequently asked questions. Input should be keywords from the question."""
     session = SessionLocal()
     try:
-        search_term = f"%{query}%"
-        faqs = session.query(FAQ).filter(
-            (FAQ.question.ilike(search_term)) |
-            (FAQ.answer.ilike(search_term)) |
-            (FAQ.category.ilike(search_term))
-        ).limit(5).all()
+        faq_ids = fts_search(session, "faqs", query, limit=5)
+        if faq_ids is not None:
+            faqs = load_in_order(session, FAQ, faq_ids)
+        else:
+            search_term = f"%{query}%"
+            faqs = session.query(FAQ).filter(
+                (FAQ.question.ilike(search_term)) |
+                (FAQ.answer.ilike(search_term)) |
+                (FAQ.category.ilike(search_term))
+            ).limit(5).all()
 
         if not faqs:
             return f"No FAQs found matching '{query}'."
@@ -148,22 +210,29 @@ def query_faqs(query: str) -> str:
         session.close()
 
 
+@cached_tool("QueryDepartments")
 def query_departments(query: str) -> str:
     """Query department information from the database. Input should be department name or code."""
     session = SessionLocal()
     try:
-        search_term = f"%{query}%"
-        depts = session.query(Department).filter(
-            (Department.name.ilike(search_term)) |
-            (Department.code.ilike(search_term))
-        ).all()
+        # Course counts come from one grouped aggregate, not a COUNT per department
+        counted = session.query(Department, func.count(Course.id)).outerjoin(Course).group_by(Department.id)
+        dept_ids = fts_search(session, "departments", query)
+        if dept_ids is not None:
+            rows = {d.id: (d, n) for d, n in counted.filter(Department.id.in_(dept_ids)).all()}
+            depts = [rows[i] for i in dept_ids if i in rows]
+        else:
+            search_term = f"%{query}%"
+            depts = counted.filter(
+                (Department.name.ilike(search_term)) |
+                (Department.code.ilike(search_term))
+            ).all()
 
         if not depts:
             return f"No departments found matching '{query}'."
 
         results = []
-        for d in depts:
-            course_count = session.query(Course).filter_by(department_id=d.id).count()
+        for d, course_count in depts:
             results.append(
                 f"🏛️ {d.name} ({d.code})\n"
                 f"   HOD: {d.hod}\n"
@@ -176,6 +245,20 @@ def query_departments(query: str) -> str:
         session.close()
 
 
+# ============================================
+# Async Tool Wrappers
+# ============================================
+
+def _make_async(func):
+    """Wrap a blocking tool function so it runs on the shared worker pool."""
+    async def _coroutine(query: str) -> str:
+        return await run_in_worker(func, query)
+
+    _coroutine.__name__ = f"a{func.__name__}"
+    _coroutine.__doc__ = func.__doc__
+    return _coroutine
+
+
 # ============================================
 # Define Agent Tools
 # ============================================
@@ -184,31 +267,39 @@ AGENT_TOOLS = [
     Tool(
         name="SearchKnowledgeBase",
         func=search_knowledge_base,
-        description="Search the KLU knowledge base for general information about admissions, fees, placements, campus facilities, academic calendar, student clubs, events, and university overview. Use this for broad or general questions."
+        coroutine=_make_async(search_knowledge_base),
+        description=("Search the KLU knowledge base for general information about admissions, fees, placements, campus facilities, academic calendar, student clubs, events, and university overview. Use this for broad or general questions. "
+                    "Optionally prefix the input with a category to narrow the search, e.g. 'fees: hostel charges'. "
+                    f"Categories: {', '.join(CATEGORIES)}.")
     ),
     Tool(
         name="QueryCourses",
         func=query_courses,
+        coroutine=_make_async(query_courses),
         description="Query the database for specific course information including course names, departments, fees, seats, and duration. Use when user asks about specific courses or programs."
     ),
     Tool(
         name="QueryEvents",
         func=query_events,
+        coroutine=_make_async(query_events),
         description="Query upcoming events, workshops, seminars, and fests at KLU. Use when user asks about events or activities."
     ),
     Tool(
         name="QueryHostel",
         func=query_hostel,
+        coroutine=_make_async(query_hostel),
         description="Query hostel details including room types, fees, amenities, and capacity. Use when user asks about accommodation."
     ),
     Tool(
         name="QueryFAQs",
         func=query_faqs,
+        coroutine=_make_async(query_faqs),
         description="Search frequently asked questions about KLU. Use when the question seems like a common query."
     ),
     Tool(
         name="QueryDepartments",
         func=query_departments,
+        coroutine=_make_async(query_departments),
         description="Query department information including HOD, faculty count, and description. Use when user asks about specific departments."
     )
 ]
@@ -231,6 +322,10 @@ You have access to the following tools to answer questions accurately:
 4. Be friendly, professional, and use markdown formatting.
 5. When providing fees, always include ₹ symbol.
 6. For complex questions, use multiple tools if needed.
+7. Use the conversation so far to resolve follow-ups ("what about its fees?"), but still look facts up with the tools.
+
+## Conversation so far:
+{chat_history}
 
 Use the following format:
 
@@ -249,23 +344,67 @@ Question: {input}
 Thought: {agent_scratchpad}""")
 
 
+# ============================================
+# Planner Mode (native tool calling)
+# ============================================
+# The model may request several tool calls in one step; the async
+# AgentExecutor runs them concurrently (asyncio.gather over the tool
+# coroutines, which execute on the worker pool) and returns every
+# observation to the model in a single step.
+
+PLANNER_TOOLS = [
+    StructuredTool.from_function(
+        func=tool.func,
+        coroutine=tool.coroutine,
+        name=tool.name,
+        description=tool.description
+    )
+    for tool in AGENT_TOOLS
+]
+
+PLANNER_SYSTEM_PROMPT = """You are **KLU Agent**, the official AI assistant for KL University (KLU), Vaddeswaram, Andhra Pradesh, India.
+
+## Instructions:
+1. Use the tools to find accurate information before answering.
+2. ALWAYS use at least one tool before giving your final answer.
+3. NEVER make up information. If tools return no results, say you don't have that information.
+4. Be friendly, professional, and use markdown formatting.
+5. When providing fees, always include ₹ symbol.
+6. When a question has several parts (comparing departments, fees AND hostel, ...), request ALL the tool calls you need at once in a single step - they run in parallel.
+7. Use the conversation so far to resolve follow-ups, but still look facts up with the tools.
+
+## Conversation so far:
+{chat_history}"""
+
+PLANNER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", PLANNER_SYSTEM_PROMPT),
+    ("human", "{input}"),
+    MessagesPlaceholder("agent_scratchpad"),
+])
+
+
 # ============================================
 # Agent Builder
 # ============================================
 
 def create_klu_agent():
-    """Create and return the KLU Agent with all tools."""
+    """Create and return the KLU Agent with all tools (ReAct or planner mode)."""
     llm = get_llm()
 
-    agent = create_react_agent(
-        llm=llm,
-        tools=AGENT_TOOLS,
-        prompt=AGENT_PROMPT
-    )
+    if config.AGENT_MODE == "tools":
+        tools = PLANNER_TOOLS
+        agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=PLANNER_PROMPT)
+    else:
+        tools = AGENT_TOOLS
+        agent = create_react_agent(
+            llm=llm,
+            tools=tools,
+            prompt=AGENT_PROMPT
+        )
 
     agent_executor = AgentExecutor(
         agent=agent,
-        tools=AGENT_TOOLS,
+        tools=tools,
         verbose=True,
         handle_parsing_errors=True,
         max_iterations=5,
@@ -275,36 +414,80 @@ def create_klu_agent():
     return agent_executor
 
 
-def run_agent(query: str) -> dict:
+_agent_registry = {}
+_agent_registry_lock = threading.Lock()
+
+
+def get_klu_agent():
+    """
+    Get the shared KLU Agent for the current LLM configuration.
+    The executor is built once and reused across requests; it is rebuilt
+    only when the provider/model configuration or the agent mode changes.
+    """
+    key = (get_llm_config_key(), config.AGENT_MODE)
+    agent_executor = _agent_registry.get(key)
+
+    if agent_executor is None:
+        with _agent_registry_lock:
+            agent_executor = _agent_registry.get(key)
+            if agent_executor is None:
+                agent_executor = create_klu_agent()
+                _agent_registry.clear()
+                _agent_registry[key] = agent_executor
+
+    return agent_executor
+
+
+def reset_agent_registry():
+    """Drop the cached agent so the next request rebuilds it."""
+    with _agent_registry_lock:
+        _agent_registry.clear()
+
+
+def _format_result(result: dict) -> dict:
+    """Convert raw AgentExecutor output into the API response shape."""
+    # Extract tools used from intermediate steps
+    tools_used = []
+    sources = set()
+    for step in result.get("intermediate_steps", []):
+        if len(step) >= 2:
+            action = step[0]
+            tools_used.append(action.tool)
+            # Add source based on tool
+            if action.tool == "SearchKnowledgeBase":
+                sources.add("KLU Knowledge Base (Documents)")
+            elif action.tool in ["QueryCourses", "QueryEvents", "QueryHostel", "QueryFAQs", "QueryDepartments"]:
+                sources.add("KLU College Database")
+
+    return {
+        "answer": result.get("output", "I couldn't generate a response. Please try again."),
+        "sources": list(sources) if sources else ["KLU Knowledge Base"],
+        "tools_used": tools_used
+    }
+
+
+NO_HISTORY = "(new conversation)"
+
+
+def run_agent(query: str, chat_history: str = "") -> dict:
     """
     Run the KLU Agent on a query and return structured response.
 
+    Args:
+        chat_history: rolling summary + recent turns of this conversation
+
     Returns:
         dict with 'answer', 'sources', and 'tools_used'
     """
-    agent = create_klu_agent()
+    agent = get_klu_agent()
 
     try:
-        result = agent.invoke({"input": query})
-
-        # Extract tools used from intermediate steps
-        tools_used = []
-        sources = set()
-        for step in result.get("intermediate_steps", []):
-            if len(step) >= 2:
-                action = step[0]
-                tools_used.append(action.tool)
-                # Add source based on tool
-                if action.tool == "SearchKnowledgeBase":
-                    sources.add("KLU Knowledge Base (Documents)")
-                elif action.tool in ["QueryCourses", "QueryEvents", "QueryHostel", "QueryFAQs", "QueryDepartments"]:
-                    sources.add("KLU College Database")
-
-        return {
-            "answer": result.get("output", "I couldn't generate a response. Please try again."),
-            "sources": list(sources) if sources else ["KLU Knowledge Base"],
-            "tools_used": tools_used
-        }
+        result = agent.invoke(
+            {"input": query, "chat_history": chat_history or NO_HISTORY},
+            config={"callbacks": [MetricsCallbackHandler(agent_run=True)]}
+        )
+        AGENT_RUNS.inc(outcome="ok")
+        return _format_result(result)
 
     except Exception as e:
         print(f"❌ Agent error: {e}")
@@ -312,8 +495,129 @@ def run_agent(query: str) -> dict:
         return _fallback_rag(query)
 
 
+async def arun_agent(query: str, chat_history: str = "") -> dict:
+    """
+    Async variant of run_agent for use inside the event loop.
+
+    LLM calls are awaited natively and tools run through their coroutines,
+    which push blocking DB and vector-store work onto the worker pool.
+
+    Returns:
+        dict with 'answer', 'sources', and 'tools_used'
+    """
+    agent = get_klu_agent()
+
+    try:
+        result = await agent.ainvoke(
+            {"input": query, "chat_history": chat_history or NO_HISTORY},
+            config={"callbacks": [MetricsCallbackHandler(agent_run=True)]}
+        )
+        AGENT_RUNS.inc(outcome="ok")
+        return _format_result(result)
+
+    except Exception as e:
+        print(f"❌ Agent error: {e}")
+        # Fallback to simple RAG if agent fails
+        return await run_in_worker(_fallback_rag, query)
+
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+
+
+def _chunk_text(chunk) -> str:
+    """Extract text from an LLM or chat-model stream chunk."""
+    content = getattr(chunk, "content", None)
+    if content is None:
+        return getattr(chunk, "text", "") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return content
+
+
+async def astream_agent(query: str, chat_history: str = ""):
+    """
+    Run the KLU Agent and yield progress events as they happen.
+
+    Built on LangChain's callback-driven event stream, so the LLM streams
+    tokens while the agent loop runs. Yields (event, data) tuples:
+        ("tool_start", {"tool", "input"})
+        ("tool_end", {"tool", "elapsed"})
+        ("token", {"text"})          - final-answer tokens only
+        ("reset", {})                - discard the tokens sent so far
+        ("result", {"answer", "sources", "tools_used"})
+    """
+    agent = get_klu_agent()
+    tool_started = {}
+    llm_buffers = {}   # run_id -> text generated so far
+    tool_call_runs = set()   # LLM steps (tools mode) that emitted tool calls
+    streamed_any = False
+
+    try:
+        async for event in agent.astream_events(
+            {"input": query, "chat_history": chat_history or NO_HISTORY},
+            config={"callbacks": [MetricsCallbackHandler(agent_run=True)]},
+            version="v2"
+        ):
+            kind = event["event"]
+            run_id = event["run_id"]
+
+            if kind == "on_tool_start":
+                tool_started[run_id] = time.perf_counter()
+                yield "tool_start", {"tool": event["name"], "input": str(event["data"].get("input", ""))}
+
+            elif kind == "on_tool_end":
+                elapsed = time.perf_counter() - tool_started.pop(run_id, time.perf_counter())
+                yield "tool_end", {"tool": event["name"], "elapsed": round(elapsed, 3)}
+
+            elif kind in ("on_llm_stream", "on_chat_model_stream") and config.AGENT_MODE == "tools":
+                # A step may say "Let me look that up..." next to its tool calls,
+                # so text is held until the step ends and is known to be the answer
+                chunk = event["data"]["chunk"]
+                if getattr(chunk, "tool_call_chunks", None):
+                    tool_call_runs.add(run_id)
+                llm_buffers[run_id] = llm_buffers.get(run_id, "") + _chunk_text(chunk)
+
+            elif kind in ("on_llm_end", "on_chat_model_end") and config.AGENT_MODE == "tools":
+                text = llm_buffers.pop(run_id, "")
+                called_tools = run_id in tool_call_runs or getattr(event["data"].get("output"), "tool_calls", None)
+                tool_call_runs.discard(run_id)
+                if text and not called_tools:
+                    streamed_any = True
+                    yield "token", {"text": text}
+
+            elif kind in ("on_llm_stream", "on_chat_model_stream"):
+                before = llm_buffers.get(run_id, "")
+                after = before + _chunk_text(event["data"]["chunk"])
+                llm_buffers[run_id] = after
+
+                marker = after.find(FINAL_ANSWER_MARKER)
+                if marker != -1:
+                    answer_start = marker + len(FINAL_ANSWER_MARKER)
+                    new_text = after[max(answer_start, len(before)):]
+                    if not streamed_any:
+                        new_text = new_text.lstrip()
+                    if new_text:
+                        streamed_any = True
+                        yield "token", {"text": new_text}
+
+            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                AGENT_RUNS.inc(outcome="ok")
+                yield "result", _format_result(event["data"]["output"])
+
+    except Exception as e:
+        print(f"❌ Agent error: {e}")
+        # Fallback to simple RAG if agent fails
+        result = await run_in_worker(_fallback_rag, query)
+        if streamed_any:
+            # Replace the partial agent answer instead of appending to it
+            yield "reset", {}
+            yield "token", {"text": result["answer"]}
+        yield "result", result
+
+
 def _fallback_rag(query: str) -> dict:
     """Fallback to simple RAG if agent fails."""
+    AGENT_RUNS.inc(outcome="fallback")
     try:
         from rag.chain import build_rag_chain
         retriever = get_retriever()
@@ -325,7 +629,10 @@ def _fallback_rag(query: str) -> dict:
             }
 
         chain = build_rag_chain(retriever)
-        result = chain.invoke({"question": query, "db_context": "No database results available."})
+        result = chain.invoke(
+            {"question": query, "db_context": "No database results available."},
+            config={"callbacks": [metrics_callback]}
+        )
 
         return {
             "answer": result,
@@ -0,0 +1,351 @@
+"""
+KLU Agent - Fast-Path Intent Router
+Answers simple structured questions ("list CSE courses", "girls hostel
+fees", "upcoming workshops") by calling one database tool directly and
+making a single LLM call to phrase the answer, instead of running the
+multi-iteration ReAct loop. Anything ambiguous falls back to the agent.
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+import numpy as np
+from langchain.prompts import PromptTemplate
+from langchain.schema.output_parser import StrOutputParser
+from agents.callbacks import metrics_callback
+from agents.klu_agent import query_courses, query_events, query_hostel, query_faqs, query_departments
+from rag.chain import get_llm
+from rag.embeddings import get_embedding_model
+from metrics import TOOL_SECONDS
+from workers import run_in_worker
+import config
+
+
+# ============================================
+# Argument Extraction
+# ============================================
+
+# (code pattern - case-sensitive, name pattern - case-insensitive, code)
+DEPARTMENT_ALIASES = [
+    (r"\bCSE\b", r"computer science", "CSE"),
+    (r"\bECE\b", r"electronics (and|&) communication", "ECE"),
+    (r"\bEEE\b", r"electrical", "EEE"),
+    (r"\bME\b", r"mechanical", "ME"),
+    (r"\bCE\b", r"civil", "CE"),
+    (r"\bIT\b", r"information technology", "IT"),
+    (r"\bMBA\b", r"business administration|management", "MBA"),
+    (r"\bBT\b", r"biotech", "BT"),
+]
+
+COURSE_SPECIALIZATIONS = [
+    (r"\bai\b|machine learning|\baiml\b", "AI & Machine Learning"),
+    (r"data science", "Data Science"),
+    (r"cyber", "Cyber Security"),
+    (r"\biot\b", "IoT"),
+    (r"vlsi", "VLSI"),
+]
+
+
+def _match_department(query: str) -> Optional[str]:
+    # Codes are case-sensitive so "it"/"me" in ordinary prose don't match
+    for code_pattern, name_pattern, code in DEPARTMENT_ALIASES:
+        if re.search(code_pattern, query) or re.search(name_pattern, query, re.IGNORECASE):
+            return code
+    return None
+
+
+def _count_departments(query: str) -> int:
+    return sum(
+        1 for code_pattern, name_pattern, _ in DEPARTMENT_ALIASES
+        if re.search(code_pattern, query) or re.search(name_pattern, query, re.IGNORECASE)
+    )
+
+
+def _extract_course_term(query: str) -> Optional[str]:
+    for pattern, term in COURSE_SPECIALIZATIONS:
+        if re.search(pattern, query, re.IGNORECASE):
+            return term
+    department = _match_department(query)
+    if department:
+        return department
+    if re.search(r"\bm\.?\s?tech\b|\bpg\b|post ?graduate", query, re.IGNORECASE):
+        return "PG"
+    if re.search(r"\bb\.?\s?tech\b|\bug\b|under ?graduate", query, re.IGNORECASE):
+        return "UG"
+    return ""
+
+
+def _extract_event_term(query: str) -> Optional[str]:
+    for pattern, term in [
+        (r"workshop|bootcamp", "workshop"),
+        (r"seminar", "seminar"),
+        (r"placement|recruitment|drive", "placement"),
+        (r"cultural", "cultural"),
+        (r"tech ?fest|samyak|hackathon", "tech"),
+    ]:
+        if re.search(pattern, query, re.IGNORECASE):
+            return term
+    return ""
+
+
+def _extract_hostel_term(query: str) -> Optional[str]:
+    if re.search(r"\bgirls?\b|ladies|women|female", query, re.IGNORECASE):
+        return "girls"
+    if re.search(r"\bboys?\b|\bmen\b|male", query, re.IGNORECASE):
+        return "boys"
+    for term in ("Single", "Double", "Triple"):
+        if re.search(term, query, re.IGNORECASE):
+            return term
+    return ""
+
+
+def _extract_department_term(query: str) -> Optional[str]:
+    return _match_department(query) or ""
+
+
+def _extract_faq_term(query: str) -> Optional[str]:
+    # FAQs are only routed when a curated topic is named explicitly
+    for pattern, term in [
+        (r"kluee+", "KLUEEE"),
+        (r"scholarship", "scholarship"),
+        (r"curfew", "curfew"),
+        (r"dress ?code", "dress code"),
+        (r"\blms\b", "LMS"),
+        (r"ragging", "ragging"),
+    ]:
+        if re.search(pattern, query, re.IGNORECASE):
+            return term
+    return None
+
+
+# ============================================
+# Routes
+# ============================================
+
+@dataclass
+class Route:
+    tool: str
+    func: Callable[[str], str]
+    keywords: str                      # regex; a match is required to route
+    examples: List[str]                # canonical questions for embedding similarity
+    extract: Callable[[str], Optional[str]]
+    _example_matrix: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+ROUTES = [
+    Route(
+        tool="QueryCourses",
+        func=query_courses,
+        keywords=r"\bcourses?\b|\bprograms?\b|\bprogrammes?\b|\bbranch(es)?\b|\bseats?\b",
+        examples=["list CSE courses", "what courses are offered", "B.Tech programs and their fees",
+                  "how many seats in data science", "PG programs available"],
+        extract=_extract_course_term,
+    ),
+    Route(
+        tool="QueryEvents",
+        func=query_events,
+        keywords=r"\bevents?\b|\bworkshops?\b|\bseminars?\b|\bfests?\b|\bbootcamps?\b|\bhackathons?\b",
+        examples=["upcoming workshops", "what events are coming up", "any seminars this month",
+                  "when is the tech fest", "upcoming placement drives"],
+        extract=_extract_event_term,
+    ),
+    Route(
+        tool="QueryHostel",
+        func=query_hostel,
+        keywords=r"\bhostels?\b|\baccommodation\b|\brooms?\b",
+        examples=["girls hostel fees", "hostel room types", "boys hostel amenities",
+                  "how much is the hostel", "single AC room fee"],
+        extract=_extract_hostel_term,
+    ),
+    Route(
+        tool="QueryDepartments",
+        func=query_departments,
+        keywords=r"\bdepartments?\b|\bhod\b|\bhead of\b|\bfaculty\b",
+        examples=["tell me about the CSE department", "who is the HOD of ECE",
+                  "list all departments", "how many faculty in mechanical"],
+        extract=_extract_department_term,
+    ),
+    Route(
+        tool="QueryFAQs",
+        func=query_faqs,
+        keywords=r"kluee+|scholarship|curfew|dress ?code|\blms\b|ragging",
+        examples=["what is KLUEEE", "how do I apply for a scholarship", "hostel curfew time",
+                  "is there a dress code", "how to access the LMS", "anti-ragging policy"],
+        extract=_extract_faq_term,
+    ),
+]
+
+
+ROUTER_PROMPT = PromptTemplate.from_template("""You are **KLU Agent**, the official AI assistant for KL University (KLU).
+Answer the student's question using ONLY the database results below. Be friendly and concise, use markdown, and always include the ₹ symbol for fees.
+If the results do not answer the question, reply with exactly: NO_ANSWER
+
+Database results ({tool}):
+{observation}
+
+Question: {question}
+Answer:""")
+
+NO_ANSWER = "NO_ANSWER"
+
+# Comparisons need several lookups - leave them to the agent
+COMPOUND_PATTERN = r"\bcompare\b|\bvs\.?\b|\bversus\b|\bdifference\b|\bboth\b"
+
+
+# ============================================
+# Router
+# ============================================
+
+class RouterStats:
+    """Counters and latency samples for routed vs. full-agent requests."""
+
+    def __init__(self, window: int = 1000):
+        self.routed = 0
+        self.fell_back = 0
+        self.by_tool = {}
+        self._routed_latency = deque(maxlen=window)
+        self._agent_latency = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record_routed(self, tool: str, seconds: float):
+        with self._lock:
+            self.routed += 1
+            self.by_tool[tool] = self.by_tool.get(tool, 0) + 1
+            self._routed_latency.append(seconds)
+
+    def record_fallback(self):
+        with self._lock:
+            self.fell_back += 1
+
+    def record_agent(self, seconds: float):
+        with self._lock:
+            self._agent_latency.append(seconds)
+
+    @staticmethod
+    def _summary(samples) -> dict:
+        if not samples:
+            return {"count": 0}
+        ordered = sorted(samples)
+        return {
+            "count": len(ordered),
+            "p50": round(ordered[len(ordered) // 2], 3),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        }
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "routed": self.routed,
+                "fell_back": self.fell_back,
+                "by_tool": dict(self.by_tool),
+                "routed_latency": self._summary(self._routed_latency),
+                "agent_latency": self._summary(self._agent_latency),
+            }
+
+
+router_stats = RouterStats()
+_route_matrix_lock = threading.Lock()
+
+
+def _example_matrix(route: Route) -> np.ndarray:
+    """The route's example embeddings, computed on first use."""
+    if route._example_matrix is None:
+        with _route_matrix_lock:
+            if route._example_matrix is None:
+                vectors = get_embedding_model().embed_documents(route.examples)
+                route._example_matrix = np.asarray(vectors, dtype=np.float32)
+    return route._example_matrix
+
+
+def _route_similarity(route: Route, embedding: np.ndarray) -> float:
+    """Best cosine similarity between the query and the route's examples."""
+    return float(np.max(_example_matrix(route) @ embedding))
+
+
+def warm_routes():
+    """Embed all route examples up front (startup warm-up)."""
+    if config.ROUTER_ENABLED:
+        for route in ROUTES:
+            _example_matrix(route)
+
+
+def select_route(query: str, embedding: np.ndarray):
+    """
+    Pick a route for the query.
+
+    Returns:
+        (route, tool_input, confidence) or None when the agent should handle it
+    """
+    if re.search(COMPOUND_PATTERN, query, re.IGNORECASE) or _count_departments(query) > 1:
+        return None
+
+    matched = [route for route in ROUTES if re.search(route.keywords, query, re.IGNORECASE)]
+    # A named curated topic ("hostel curfew") is more specific than the table it mentions
+    faq_routes = [route for route in matched if route.tool == "QueryFAQs"]
+    if faq_routes:
+        matched = faq_routes
+    if len(matched) != 1:
+        # No intent, or a compound question spanning several tools
+        return None
+
+    route = matched[0]
+    tool_input = route.extract(query)
+    if tool_input is None:
+        return None
+
+    weight = config.ROUTER_KEYWORD_WEIGHT
+    confidence = weight + (1 - weight) * _route_similarity(route, embedding)
+    if confidence < config.ROUTER_CONFIDENCE_THRESHOLD:
+        return None
+
+    return route, tool_input, confidence
+
+
+async def try_route(query: str, embedding=None) -> Optional[dict]:
+    """
+    Answer the query on the fast path, or return None to use the full agent.
+    Makes at most one LLM call.
+    """
+    if not config.ROUTER_ENABLED:
+        return None
+
+    start = time.perf_counter()
+    try:
+        if embedding is None:
+            embedding = np.asarray(await run_in_worker(get_embedding_model().embed_query, query), dtype=np.float32)
+
+        selection = await run_in_worker(select_route, query, embedding)
+        if selection is None:
+            router_stats.record_fallback()
+            return None
+
+        route, tool_input, confidence = selection
+        with TOOL_SECONDS.time(tool=route.tool):
+            observation = await run_in_worker(route.func, tool_input)
+        if observation.startswith("No "):
+            router_stats.record_fallback()
+            return None
+
+        chain = ROUTER_PROMPT | get_llm() | StrOutputParser()
+        answer = (await chain.ainvoke(
+            {"tool": route.tool, "observation": observation, "question": query},
+            config={"callbacks": [metrics_callback]}
+        )).strip()
+        if not answer or NO_ANSWER in answer:
+            router_stats.record_fallback()
+            return None
+
+    except Exception as e:
+        print(f"⚠️ Router error, using full agent: {e}")
+        router_stats.record_fallback()
+        return None
+
+    router_stats.record_routed(route.tool, time.perf_counter() - start)
+    return {
+        "answer": answer,
+        "sources": ["KLU College Database"],
+        "tools_used": [route.tool],
+    }
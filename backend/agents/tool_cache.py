@@ -0,0 +1,99 @@
+"""
+KLU Agent - Tool Result Cache
+Memoizes the database tools (QueryCourses, QueryEvents, ...). Their output
+depends only on the input string and the database contents, so results
+are kept in a per-tool LRU and dropped whenever the database generation
+counter moves (any committed write to the college models).
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+from data.database import get_data_generation
+import config
+
+
+class ToolResultCache:
+    """Per-tool LRU caches that are all invalidated together on a DB write."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries = {}      # tool -> OrderedDict(input -> result)
+        self._hits = {}
+        self._misses = {}
+        self._generation = get_data_generation()
+        self._lock = threading.Lock()
+
+    def _check_generation(self):
+        generation = get_data_generation()
+        if generation != self._generation:
+            for entries in self._entries.values():
+                entries.clear()
+            self._generation = generation
+
+    def get(self, tool: str, key: str):
+        """Return (hit, result, generation); pass the generation back to put()."""
+        with self._lock:
+            self._check_generation()
+            entries = self._entries.setdefault(tool, OrderedDict())
+            if key in entries:
+                entries.move_to_end(key)
+                self._hits[tool] = self._hits.get(tool, 0) + 1
+                return True, entries[key], self._generation
+            self._misses[tool] = self._misses.get(tool, 0) + 1
+            return False, None, self._generation
+
+    def put(self, tool: str, key: str, result: str, generation: int):
+        with self._lock:
+            self._check_generation()
+            # The data changed while the tool ran - the result may already be stale
+            if generation != self._generation:
+                return
+            entries = self._entries.setdefault(tool, OrderedDict())
+            entries[key] = result
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            tools = sorted(set(self._hits) | set(self._misses))
+            by_tool = {}
+            for tool in tools:
+                hits, misses = self._hits.get(tool, 0), self._misses.get(tool, 0)
+                by_tool[tool] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                    "entries": len(self._entries.get(tool, ())),
+                }
+            return {"generation": self._generation, "tools": by_tool}
+
+
+tool_cache = ToolResultCache(config.TOOL_CACHE_MAX_ENTRIES)
+
+
+def cached_tool(tool: str):
+    """Decorator memoizing a `func(query: str) -> str` database tool."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(query: str) -> str:
+            if not config.TOOL_CACHE_ENABLED:
+                return func(query)
+
+            key = " ".join(query.split())
+            hit, result, generation = tool_cache.get(tool, key)
+            if hit:
+                return result
+
+            result = func(query)
+            tool_cache.put(tool, key, result, generation)
+            return result
+
+        return wrapper
+    return decorator
@@ -0,0 +1,76 @@
+"""
+KLU Agent - Agent Setup Microbenchmark
+Measures the per-request cost of obtaining an AgentExecutor: building it
+from scratch on every request (old behaviour) versus fetching it from the
+process-wide agent registry.
+
+Usage (from backend/):
+    python -m benchmarks.bench_agent_setup --iterations 200
+    python -m benchmarks.bench_agent_setup --stub   # no provider SDK needed
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+def _time_calls(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(label, samples):
+    print(
+        f"{label:<22} mean {statistics.mean(samples):8.3f} ms | "
+        f"median {statistics.median(samples):8.3f} ms | max {max(samples):8.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--stub", action="store_true", help="Use the stub LLM instead of the provider client")
+    args = parser.parse_args()
+
+    # Client construction does not contact the provider, so a placeholder key is enough
+    config.GOOGLE_API_KEY = config.GOOGLE_API_KEY or "benchmark-key"
+    config.OPENAI_API_KEY = config.OPENAI_API_KEY or "benchmark-key"
+
+    import rag.chain
+    import agents.klu_agent as klu_agent
+
+    if args.stub:
+        from benchmarks.stub_llm import install_stub_llm
+        install_stub_llm()
+        build_llm = klu_agent.get_llm
+    else:
+        build_llm = rag.chain._create_llm
+
+    def per_request_build():
+        # Old behaviour: new LLM client + prompt + executor on every request
+        original = klu_agent.get_llm
+        klu_agent.get_llm = build_llm
+        try:
+            klu_agent.create_klu_agent()
+        finally:
+            klu_agent.get_llm = original
+
+    klu_agent.reset_agent_registry()
+    klu_agent.get_klu_agent()  # first build is paid once per process
+
+    _report("per-request build", _time_calls(per_request_build, args.iterations))
+    _report("agent registry", _time_calls(klu_agent.get_klu_agent, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+KLU Agent - Chat Concurrency Benchmark
+Compares the old blocking execution path (sync run_agent called from the
+event loop) with the async path (arun_agent) as concurrent clients grow.
+
+Usage (from backend/):
+    python -m benchmarks.bench_concurrency --latency 0.2 --requests 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_llm import install_stub_llm
+from data.database import init_db, seed_db
+
+
+CONCURRENCY_LEVELS = [1, 4, 16, 64]
+QUESTIONS = [
+    "What are the girls hostel fees?",
+    "Any upcoming workshops?",
+    "List CSE courses",
+    "Tell me about the CSE department",
+]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _blocking_call(question):
+    from agents.klu_agent import run_agent
+    return run_agent(question)
+
+
+async def _async_call(question):
+    from agents.klu_agent import arun_agent
+    return await arun_agent(question)
+
+
+async def _run_level(call, clients, requests_per_client):
+    latencies = []
+
+    async def client(client_id):
+        for i in range(requests_per_client):
+            question = QUESTIONS[(client_id + i) % len(QUESTIONS)]
+            start = time.perf_counter()
+            await call(question)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    wall = time.perf_counter() - start
+    return latencies, wall
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated LLM latency per call (s)")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    args = parser.parse_args()
+
+    init_db()
+    seed_db()
+    install_stub_llm(latency=args.latency)
+
+    print(f"{'mode':<9} {'clients':>7} {'p50 (s)':>9} {'p99 (s)':>9} {'req/s':>8}")
+    for mode, call in (("blocking", _blocking_call), ("async", _async_call)):
+        for clients in CONCURRENCY_LEVELS:
+            # AgentExecutor(verbose=True) prints every step - keep the table readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                latencies, wall = await _run_level(call, clients, args.requests)
+            print(
+                f"{mode:<9} {clients:>7} "
+                f"{statistics.median(latencies):>9.3f} {_percentile(latencies, 99):>9.3f} "
+                f"{len(latencies) / wall:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+"""
+KLU Agent - Database Tool Benchmark
+Measures SQL round-trips and latency of query_courses / query_departments
+on a synthetic catalogue, comparing the old per-row lookups (N+1) with the
+eager-loaded / grouped-aggregate versions.
+
+Usage (from backend/):
+    python -m benchmarks.bench_db_tools --sizes 100 1000 10000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from data.database import Base, SessionLocal, Course, Department, init_fts
+from agents.klu_agent import query_courses, query_departments
+
+
+DEPARTMENT_COUNT = 50
+
+
+def _legacy_query_courses(query: str) -> str:
+    """query_courses as it was before eager loading (one extra query per course)."""
+    session = SessionLocal()
+    try:
+        search_term = f"%{query}%"
+        courses = session.query(Course).join(Department).filter(
+            (Course.name.ilike(search_term)) |
+            (Department.name.ilike(search_term)) |
+            (Department.code.ilike(search_term)) |
+            (Course.level.ilike(search_term))
+        ).all()
+        lines = []
+        for c in courses:
+            dept = session.query(Department).filter_by(id=c.department_id).first()
+            lines.append(f"{c.name} {dept.name if dept else 'N/A'}")
+        return "\n".join(lines)
+    finally:
+        session.close()
+
+
+def _legacy_query_departments(query: str) -> str:
+    """query_departments as it was before the grouped COUNT (one COUNT per department)."""
+    session = SessionLocal()
+    try:
+        search_term = f"%{query}%"
+        depts = session.query(Department).filter(
+            (Department.name.ilike(search_term)) |
+            (Department.code.ilike(search_term))
+        ).all()
+        lines = []
+        for d in depts:
+            course_count = session.query(Course).filter_by(department_id=d.id).count()
+            lines.append(f"{d.name} {course_count}")
+        return "\n".join(lines)
+    finally:
+        session.close()
+
+
+def _build_database(path: str, course_count: int):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    # The tools search through FTS5 when it is set up (as init_db does), LIKE otherwise
+    init_fts(engine)
+    SessionLocal.configure(bind=engine)
+
+    session = SessionLocal()
+    session.add_all([
+        Department(id=i, name=f"Department of Engineering {i}", code=f"D{i:03d}", hod=f"Dr. Head {i}",
+                   faculty_count=40, description="Synthetic department")
+        for i in range(1, DEPARTMENT_COUNT + 1)
+    ])
+    session.add_all([
+        Course(name=f"B.Tech Engineering Track {i}", code=f"C{i:06d}", department_id=i % DEPARTMENT_COUNT + 1,
+               level="UG", duration_years=4, total_seats=60, fee_per_year=150000)
+        for i in range(course_count)
+    ])
+    session.commit()
+    session.close()
+    return engine
+
+
+def _measure(engine, func, query):
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    func(query)
+    elapsed = (time.perf_counter() - start) * 1000
+    event.remove(engine, "before_cursor_execute", count)
+    return len(statements), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    cases = [
+        ("query_courses", _legacy_query_courses, query_courses, "B.Tech"),
+        ("query_departments", _legacy_query_departments, query_departments, "Engineering"),
+    ]
+
+    print(f"{'tool':<18} {'courses':>8} {'old queries':>12} {'old ms':>9} {'new queries':>12} {'new ms':>9}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = _build_database(os.path.join(tmp, "bench.db"), size)
+            for name, legacy, current, query in cases:
+                old_q, old_ms = _measure(engine, legacy, query)
+                new_q, new_ms = _measure(engine, current, query)
+                print(f"{name:<18} {size:>8} {old_q:>12} {old_ms:>9.1f} {new_q:>12} {new_ms:>9.1f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
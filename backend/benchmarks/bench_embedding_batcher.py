@@ -0,0 +1,91 @@
+"""
+KLU Agent - Embedding Micro-Batcher Benchmark
+Concurrent clients (threads, like the worker pool) each embed a stream of
+distinct queries - no cache hits - either straight through the model
+(one batch-size-1 forward pass per query) or through MicroBatchedEmbeddings
+at several max-wait settings. Reports embeddings/s, per-query latency and
+the mean batch size.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embedding_batcher --clients 32 --queries 20
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+EVAL_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_eval.json")
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _run(model, clients: int, queries_per_client: int, questions: list):
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client(client_id):
+        barrier.wait()
+        for i in range(queries_per_client):
+            # Distinct text per call, as the query cache would otherwise absorb repeats
+            text = f"{questions[(client_id + i) % len(questions)]} ({client_id}-{i})"
+            start = time.perf_counter()
+            model.embed_query(text)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return len(latencies) / wall, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=20, help="Queries per client")
+    parser.add_argument("--max-batch", type=int, default=config.EMBEDDING_BATCH_MAX_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0, 2, 5])
+    args = parser.parse_args()
+
+    from rag.embeddings import MicroBatchedEmbeddings, create_base_embeddings
+
+    with open(EVAL_SET_PATH, encoding="utf-8") as f:
+        questions = [item["question"] for item in json.load(f)]
+
+    base, model_name = create_base_embeddings()
+    base.embed_documents(questions[:8])   # warm-up
+    print(f"{model_name}: {args.clients} clients x {args.queries} queries\n")
+
+    print(f"{'mode':<18} {'embeddings/s':>12} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>10}")
+    rate, latencies = _run(base, args.clients, args.queries, questions)
+    print(f"{'unbatched':<18} {rate:>12.1f} {_percentile(latencies, 50) * 1000:>8.2f} "
+          f"{_percentile(latencies, 99) * 1000:>8.2f} {1:>10.2f}")
+
+    for max_wait_ms in args.max_wait_ms:
+        batcher = MicroBatchedEmbeddings(base, max_batch=args.max_batch, max_wait=max_wait_ms / 1000)
+        rate, latencies = _run(batcher, args.clients, args.queries, questions)
+        label = f"batched {max_wait_ms:g} ms"
+        print(f"{label:<18} {rate:>12.1f} {_percentile(latencies, 50) * 1000:>8.2f} "
+              f"{_percentile(latencies, 99) * 1000:>8.2f} {batcher.stats()['mean_batch_size']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+KLU Agent - Embedding Backend Benchmark
+Compares the PyTorch sentence-transformers model (fp32) with the int8 ONNX
+Runtime export (EMBEDDING_BACKEND=onnx) on the knowledge-base chunks:
+
+  accuracy    cosine agreement between fp32 and int8 vectors of every chunk,
+              and top-k retrieval overlap for the retrieval eval questions
+  throughput  chunks/s for bulk embedding (batched) and single-query latency
+
+Usage (from backend/):
+    python -m benchmarks.bench_embeddings --k 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import config
+
+
+EVAL_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_eval.json")
+
+
+def _knowledge_base_chunks() -> list:
+    """The chunk texts the index would hold for the knowledge base JSON."""
+    from rag.ingestion import iter_chunks
+    from rag.vector_store import KNOWLEDGE_BASE_PATH, _get_text_splitter, _load_knowledge_base_file
+    documents = _load_knowledge_base_file(KNOWLEDGE_BASE_PATH)
+    return [chunk.page_content for chunk in iter_chunks(documents, _get_text_splitter())]
+
+
+def _throughput(model, texts, queries):
+    model.embed_documents(texts[:8])   # warm-up (graph optimization, allocator)
+
+    start = time.perf_counter()
+    vectors = np.asarray(model.embed_documents(texts), dtype=np.float32)
+    bulk_seconds = time.perf_counter() - start
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        model.embed_query(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return vectors, len(texts) / bulk_seconds, statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5, help="Top-k for the retrieval overlap check")
+    args = parser.parse_args()
+
+    config.EMBEDDING_BACKEND = "torch"
+    from rag.embeddings import create_base_embeddings
+    from rag.onnx_embeddings import load_onnx_embeddings
+
+    texts = _knowledge_base_chunks()
+    with open(EVAL_SET_PATH, encoding="utf-8") as f:
+        queries = [item["question"] for item in json.load(f)]
+    print(f"{len(texts)} knowledge-base chunks, {len(queries)} queries\n")
+
+    fp32_model, _ = create_base_embeddings()
+    int8_model = load_onnx_embeddings()
+
+    results = {}
+    for name, model in (("torch fp32", fp32_model), ("onnx int8", int8_model)):
+        results[name] = _throughput(model, texts, queries)
+
+    print(f"{'backend':<11} {'chunks/s':>9} {'query p50 ms':>13}")
+    for name, (_, rate, query_ms) in results.items():
+        print(f"{name:<11} {rate:>9.1f} {query_ms:>13.2f}")
+
+    fp32_vectors, int8_vectors = results["torch fp32"][0], results["onnx int8"][0]
+    agreement = np.sum(fp32_vectors * int8_vectors, axis=1)
+    print(f"\nCosine agreement (fp32 vs int8, per chunk): mean {agreement.mean():.4f}, "
+          f"min {agreement.min():.4f}, p1 {np.percentile(agreement, 1):.4f}")
+
+    fp32_queries = np.asarray([fp32_model.embed_query(q) for q in queries], dtype=np.float32)
+    int8_queries = np.asarray([int8_model.embed_query(q) for q in queries], dtype=np.float32)
+    overlaps = []
+    for fp32_query, int8_query in zip(fp32_queries, int8_queries):
+        fp32_top = set(np.argsort(-(fp32_vectors @ fp32_query))[:args.k])
+        int8_top = set(np.argsort(-(int8_vectors @ int8_query))[:args.k])
+        overlaps.append(len(fp32_top & int8_top) / args.k)
+    print(f"Top-{args.k} retrieval overlap over {len(queries)} queries: {statistics.mean(overlaps):.3f} "
+          f"(identical top-{args.k} for {sum(o == 1.0 for o in overlaps)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+KLU Agent - Full-Text Search Benchmark
+Compares the old substring search (ilike '%<whole input>%') with the FTS5
+index on a synthetic FAQ table: lookup latency and recall of a set of
+known "needle" FAQs asked in natural phrasing.
+
+Usage (from backend/):
+    python -m benchmarks.bench_fts --rows 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+import data.database as database
+from data.database import Base, SessionLocal, FAQ, fts_search
+
+
+FILLER_WORDS = (
+    "campus library transport canteen semester exam result portal wifi gym club "
+    "lab project internship attendance timetable syllabus registration counselling"
+).split()
+
+# (FAQ question, how a student / the agent actually asks it)
+NEEDLES = [
+    ("How can I apply for the Zephyr merit scholarship?", "zephyr scholarship application"),
+    ("What is the curfew for the Orion hostel block?", "orion hostel curfew"),
+    ("Where do I collect my Quasar lab coat?", "quasar lab coat collection"),
+    ("Is the Nimbus shuttle free for day scholars?", "nimbus shuttle day scholars"),
+    ("When does the Aurora coding contest start?", "aurora coding contest date"),
+    ("Who approves Tundra project extensions?", "tundra project extension approval"),
+    ("How do I reset my Pulsar portal password?", "pulsar password reset"),
+    ("What documents are needed for Vortex counselling?", "vortex counselling documents"),
+]
+
+
+def _legacy_search(session, query):
+    search_term = f"%{query}%"
+    return [f.id for f in session.query(FAQ).filter(
+        (FAQ.question.ilike(search_term)) |
+        (FAQ.answer.ilike(search_term)) |
+        (FAQ.category.ilike(search_term))
+    ).limit(5).all()]
+
+
+def _fts(session, query):
+    return fts_search(session, "faqs", query, limit=5) or []
+
+
+def _build(path, rows):
+    engine = create_engine(f"sqlite:///{path}")
+    database.engine = engine
+    SessionLocal.configure(bind=engine)
+    Base.metadata.create_all(engine)
+    database.init_fts()
+
+    rng = random.Random(42)
+    filler = [
+        {"question": " ".join(rng.choices(FILLER_WORDS, k=8)) + "?",
+         "answer": " ".join(rng.choices(FILLER_WORDS, k=30)),
+         "category": rng.choice(["general", "academic", "hostel", "fees"])}
+        for _ in range(rows - len(NEEDLES))
+    ]
+    needles = [{"question": q, "answer": "See the relevant office.", "category": "general"} for q, _ in NEEDLES]
+
+    with engine.begin() as conn:
+        conn.execute(FAQ.__table__.insert(), filler)
+        needle_ids = [conn.execute(FAQ.__table__.insert().values(**n)).inserted_primary_key[0] for n in needles]
+    return engine, needle_ids
+
+
+def _evaluate(session, search, needle_ids, repeats):
+    hits, latencies = 0, []
+    for (_, asked), target in zip(NEEDLES, needle_ids):
+        for _ in range(repeats):
+            start = time.perf_counter()
+            ids = search(session, asked)
+            latencies.append((time.perf_counter() - start) * 1000)
+        hits += target in ids
+    return hits / len(NEEDLES), statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Building {args.rows} FAQ rows...")
+        engine, needle_ids = _build(os.path.join(tmp, "bench.db"), args.rows)
+        if not database.fts_available:
+            print("SQLite was built without FTS5 - nothing to compare")
+            return
+
+        session = SessionLocal()
+        for label, search in (("ilike substring", _legacy_search), ("fts5 bm25", _fts)):
+            recall, median_ms = _evaluate(session, search, needle_ids, args.repeats)
+            print(f"{label:<16} recall@5 {recall:5.2f} | median latency {median_ms:8.3f} ms")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
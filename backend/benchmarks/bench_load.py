@@ -0,0 +1,324 @@
+"""
+KLU Agent - Offline Load Test
+Replays a corpus of realistic requests (benchmarks/load_corpus.json) against
+/api/chat, /api/events and /api/faqs through an in-process ASGI client, with
+the app's lifespan running, at several concurrency levels. Fully offline:
+the LLM is the scripted stub (deterministic ReAct traces) and embeddings are
+deterministic feature hashing, indexed into a throwaway directory.
+
+Prints one JSON document per run - throughput, p50/p95/p99 per endpoint,
+agent iterations, memory and a per-stage breakdown from the /metrics
+histograms - so runs can be diffed over time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_load --concurrency 1 8 32 --requests 200 --output load.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_corpus.json")
+ENDPOINTS = ("chat", "events", "faqs")
+
+
+def _configure_environment(args) -> str:
+    """Point the app at a scratch index and offline settings (before config is imported)."""
+    workdir = tempfile.mkdtemp(prefix="klu-bench-")
+    os.environ["NUMPY_INDEX_DIR"] = os.path.join(workdir, "numpy_index")
+    os.environ["CHROMA_PERSIST_DIR"] = os.path.join(workdir, "chroma_db")
+    os.environ["VECTOR_BACKEND"] = args.backend
+    os.environ["INGEST_WORKERS"] = "1"          # worker processes would load the real model
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+    os.environ["SEMANTIC_CACHE_ENABLED"] = "true" if args.semantic_cache else "false"
+    os.environ["ROUTER_ENABLED"] = "false" if args.no_router else "true"
+    os.environ["LLM_PROVIDER"] = "gemini"
+    os.environ["GOOGLE_API_KEY"] = "offline-benchmark"   # the stub never uses it
+    return workdir
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _latency_summary(values) -> dict:
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean_ms": round(statistics.mean(values) * 1000, 2),
+        "p50_ms": round(_percentile(values, 50) * 1000, 2),
+        "p95_ms": round(_percentile(values, 95) * 1000, 2),
+        "p99_ms": round(_percentile(values, 99) * 1000, 2),
+    }
+
+
+def _memory_mb() -> dict:
+    """Current and peak RSS of this process."""
+    status = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    status[key] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    peak = status.get("VmHWM", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+    return {"rss_mb": round(status.get("VmRSS", peak), 1), "peak_rss_mb": round(peak, 1)}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def _build_plan(corpus: dict, requests: int, seed: int) -> list:
+    """Deterministic request sequence following the corpus endpoint mix."""
+    rng = random.Random(seed)
+    weights = [corpus["mix"].get(endpoint, 0) for endpoint in ENDPOINTS]
+    plan = []
+    for _ in range(requests):
+        endpoint = rng.choices(ENDPOINTS, weights)[0]
+        if endpoint == "chat":
+            plan.append((endpoint, rng.choice(corpus["questions"])))
+        elif endpoint == "faqs":
+            plan.append((endpoint, rng.choice(corpus["faq_categories"])))
+        else:
+            plan.append((endpoint, None))
+    return plan
+
+
+async def _send(client, endpoint: str, payload):
+    if endpoint == "chat":
+        return await client.post("/api/chat", json={"message": payload})
+    if endpoint == "faqs":
+        return await client.get("/api/faqs", params={"category": payload} if payload else None)
+    return await client.get("/api/events")
+
+
+# ============================================
+# Metrics Snapshots
+# ============================================
+
+def _stage_metrics():
+    import metrics
+    return {
+        "http": metrics.HTTP_REQUEST_SECONDS,
+        "embedding": metrics.EMBEDDING_SECONDS,
+        "vector_search": metrics.VECTOR_SEARCH_SECONDS,
+        "tool": metrics.TOOL_SECONDS,
+        "llm": metrics.LLM_SECONDS,
+        "agent_iterations": metrics.AGENT_ITERATIONS,
+    }
+
+
+def _counter_metrics():
+    import metrics
+    return {
+        "agent_runs": metrics.AGENT_RUNS,
+        "chat_answers": metrics.CHAT_ANSWERS,
+        "llm_tokens": metrics.LLM_TOKENS,
+    }
+
+
+def _snapshot() -> dict:
+    return {
+        "stages": {name: metric.snapshot() for name, metric in _stage_metrics().items()},
+        "counters": {name: metric.snapshot() for name, metric in _counter_metrics().items()},
+    }
+
+
+def _diff(before: dict, after: dict) -> dict:
+    """Per-stage count / total / mean between two snapshots."""
+    stages = {}
+    for name, series in after["stages"].items():
+        stage = {}
+        for key, current in series.items():
+            previous = before["stages"][name].get(key, {"count": 0, "sum": 0.0})
+            count = current["count"] - previous["count"]
+            if count:
+                total = current["sum"] - previous["sum"]
+                stage[key or "all"] = {
+                    "count": count,
+                    "total_s": round(total, 4),
+                    "mean": round(total / count, 5),
+                }
+        stages[name] = stage
+
+    counters = {}
+    for name, series in after["counters"].items():
+        counters[name] = {
+            key or "all": value - before["counters"][name].get(key, 0)
+            for key, value in series.items()
+            if value - before["counters"][name].get(key, 0)
+        }
+    return {"stages": stages, "counters": counters}
+
+
+# ============================================
+# Runner
+# ============================================
+
+def _reset_caches():
+    """Start every level cold so levels are comparable."""
+    from agents.tool_cache import tool_cache
+    tool_cache.clear()
+    from rag.semantic_cache import get_answer_cache
+    cache = get_answer_cache()
+    if cache is not None:
+        cache.clear()
+
+
+async def _wait_until_ready(client, timeout: float):
+    """Wait for the background index build, then warm the agent with one chat."""
+    import rag.vector_store
+    deadline = time.perf_counter() + timeout
+    while rag.vector_store._vector_store is None:
+        if time.perf_counter() > deadline:
+            raise RuntimeError("Vector store did not become ready")
+        await asyncio.sleep(0.1)
+    response = await client.post("/api/chat", json={"message": "What is the KLUEEE exam?"})
+    response.raise_for_status()
+
+
+async def _run_level(client, plan: list, clients: int) -> dict:
+    latencies = {endpoint: [] for endpoint in ENDPOINTS}
+    errors = 0
+    next_index = iter(range(len(plan)))
+
+    async def worker():
+        nonlocal errors
+        for index in next_index:
+            endpoint, payload = plan[index]
+            start = time.perf_counter()
+            try:
+                response = await _send(client, endpoint, payload)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                latencies[endpoint].append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    _reset_caches()
+    before = _snapshot()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    wall = time.perf_counter() - start
+    breakdown = _diff(before, _snapshot())
+
+    iterations = breakdown["stages"].pop("agent_iterations").get("all")
+    completed = sum(len(values) for values in latencies.values())
+    return {
+        "concurrency": clients,
+        "requests": len(plan),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(completed / wall, 2) if wall else 0.0,
+        "latency": {
+            "all": _latency_summary([v for values in latencies.values() for v in values]),
+            **{endpoint: _latency_summary(values) for endpoint, values in latencies.items()},
+        },
+        "agent_iterations_mean": round(iterations["mean"], 2) if iterations else None,
+        "stages": breakdown["stages"],
+        "counters": breakdown["counters"],
+        "memory": _memory_mb(),
+    }
+
+
+async def _run(args) -> dict:
+    import httpx
+    from benchmarks.stub_embeddings import install_stub_embeddings
+    from benchmarks.stub_llm import install_stub_llm
+
+    install_stub_embeddings()
+    install_stub_llm(latency=args.latency, mode=args.mode)
+    from main import app
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        corpus = json.load(f)
+    plan = _build_plan(corpus, args.requests, args.seed)
+
+    startup = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await _wait_until_ready(client, args.ready_timeout)
+            startup = time.perf_counter() - startup
+
+            levels = []
+            for clients in args.concurrency:
+                print(f"  concurrency {clients}...", file=sys.stderr)
+                levels.append(await _run_level(client, plan, clients))
+
+    return {
+        "benchmark": "load",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": _git_commit(),
+        "settings": {
+            "llm_latency": args.latency,
+            "agent_mode": args.mode,
+            "vector_backend": args.backend,
+            "semantic_cache": args.semantic_cache,
+            "router": not args.no_router,
+            "requests_per_level": args.requests,
+            "seed": args.seed,
+        },
+        "startup_seconds": round(startup, 3),
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated LLM latency per call (s)")
+    parser.add_argument("--mode", choices=("react", "tools"), default="react", help="Agent mode")
+    parser.add_argument("--backend", choices=("numpy", "chroma"), default="numpy", help="Vector backend")
+    parser.add_argument("--semantic-cache", action="store_true", help="Keep the semantic answer cache on")
+    parser.add_argument("--no-router", action="store_true", help="Disable the fast-path router")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--ready-timeout", type=float, default=300)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    workdir = _configure_environment(args)
+    try:
+        # The app and AgentExecutor(verbose=True) log every step - keep the report clean
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            report = asyncio.run(_run(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
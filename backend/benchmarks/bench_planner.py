@@ -0,0 +1,73 @@
+"""
+KLU Agent - Planner Mode Benchmark
+Compares the text ReAct agent (one tool per LLM step) with planner mode
+(native tool calling, several tool calls per step run concurrently) on
+compound and simple questions: LLM calls per question and wall-clock
+latency, using the scripted stub models.
+
+Usage (from backend/):
+    python -m benchmarks.bench_planner --latency 0.5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_llm import install_stub_llm
+from data.database import init_db, seed_db
+
+
+QUESTIONS = [
+    ("compound", "Compare CSE and ECE fees and hostel options"),
+    ("compound", "CSE vs ME vs CE courses"),
+    ("compound", "ECE courses and upcoming workshops"),
+    ("simple", "List CSE courses"),
+    ("simple", "What are the girls hostel fees?"),
+]
+
+
+async def _measure(mode: str, latency: float, question: str, repeats: int):
+    from agents.klu_agent import arun_agent
+
+    llm = install_stub_llm(latency=latency, mode=mode)
+    # Tool results are memoized - measure real tool work on every run
+    from agents.tool_cache import tool_cache
+
+    latencies, calls, tools = [], [], 0
+    for _ in range(repeats):
+        tool_cache.clear()
+        llm.calls = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await arun_agent(question)
+        latencies.append(time.perf_counter() - start)
+        calls.append(llm.calls)
+        tools = len(result["tools_used"])
+    return statistics.median(latencies), statistics.median(calls), tools
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated LLM latency per call (s)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    init_db()
+    seed_db()
+
+    print(f"{'kind':<9} {'question':<45} {'mode':<6} {'LLM calls':>9} {'tools':>6} {'latency s':>10}")
+    for kind, question in QUESTIONS:
+        for mode in ("react", "tools"):
+            latency, calls, tools = await _measure(mode, args.latency, question, args.repeats)
+            print(f"{kind:<9} {question[:45]:<45} {mode:<6} {calls:>9} {tools:>6} {latency:>10.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""
+KLU Agent - Vector Backend Benchmark
+Compares the Chroma backend with the in-process NumPy index on synthetic
+normalized 384-d embeddings: build time, query latency (p50/p99, with and
+without a category filter) and resident memory after opening the index.
+Each (backend, size) pair runs in a fresh process so RSS is not shared.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_backends --sizes 1000 10000 100000
+"""
+
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+
+DIM = 384
+CATEGORIES = ["overview", "admissions", "departments", "placements", "campus", "fees", "events", "contact"]
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _dataset(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"chunk-{i}" for i in range(n)]
+    documents = [f"Synthetic chunk {i}" for i in range(n)]
+    metadatas = [{"source": "bench", "category": CATEGORIES[i % len(CATEGORIES)]} for i in range(n)]
+    queries = rng.standard_normal((200, DIM), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return ids, vectors, documents, metadatas, queries
+
+
+def _build(backend: str, directory: str, ids, vectors, documents, metadatas):
+    batch = 5000
+    if backend == "numpy":
+        from rag.numpy_store import NumpyVectorStore
+        store = NumpyVectorStore(persist_directory=directory)
+        for i in range(0, len(ids), batch):
+            store.upsert(ids[i:i + batch], vectors[i:i + batch], documents[i:i + batch], metadatas[i:i + batch])
+        store.persist()
+    else:
+        from langchain_community.vectorstores import Chroma
+        store = Chroma(persist_directory=directory, collection_name="bench")
+        for i in range(0, len(ids), batch):
+            store._collection.upsert(ids=ids[i:i + batch], embeddings=vectors[i:i + batch].tolist(),
+                                     documents=documents[i:i + batch], metadatas=metadatas[i:i + batch])
+
+
+def _open(backend: str, directory: str):
+    if backend == "numpy":
+        from rag.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(persist_directory=directory)
+    from langchain_community.vectorstores import Chroma
+    return Chroma(persist_directory=directory, collection_name="bench")
+
+
+def _latencies(store, queries, k: int, filter=None):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        store.similarity_search_by_vector(query.tolist(), k=k, filter=filter)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 3),
+    }
+
+
+def _run_case(backend: str, n: int, k: int, results):
+    ids, vectors, documents, metadatas, queries = _dataset(n)
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        _build(backend, directory, ids, vectors, documents, metadatas)
+        build_seconds = time.perf_counter() - start
+
+        # Measure a fresh open + queries in this process without the build data around
+        del vectors, documents, metadatas
+        rss_before = _rss_mb()
+        store = _open(backend, directory)
+        _latencies(store, queries[:10], k)  # warm up
+        unfiltered = _latencies(store, queries, k)
+        filtered = _latencies(store, queries, k, filter={"category": "fees"})
+        rss_after = _rss_mb()
+
+    results.put({
+        "backend": backend,
+        "chunks": n,
+        "build_s": round(build_seconds, 2),
+        "query": unfiltered,
+        "filtered_query": filtered,
+        "rss_mb": round(rss_after, 1),
+        "rss_delta_mb": round(rss_after - rss_before, 1),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'backend':<8} {'chunks':>8} {'build s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'filt p50':>9} {'RSS MB':>8} {'ΔRSS MB':>8}")
+    for n in args.sizes:
+        for backend in args.backends:
+            results = ctx.Queue()
+            process = ctx.Process(target=_run_case, args=(backend, n, args.k, results))
+            process.start()
+            row = results.get()
+            process.join()
+            print(f"{row['backend']:<8} {row['chunks']:>8} {row['build_s']:>8} "
+                  f"{row['query']['p50_ms']:>8} {row['query']['p99_ms']:>8} "
+                  f"{row['filtered_query']['p50_ms']:>9} {row['rss_mb']:>8} {row['rss_delta_mb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+KLU Agent - Offline Retrieval Evaluation
+Reports recall@k and per-query latency for dense (MMR), BM25 and hybrid
+(reciprocal rank fusion) retrieval over the indexed knowledge base, plus
+hybrid retrieval restricted to the inferred category of each question.
+
+A question counts as recalled when any of the top-k chunks contains its
+expected snippet (benchmarks/retrieval_eval.json).
+
+Usage (from backend/):
+    python -m benchmarks.eval_retrieval --k 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+EVAL_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_eval.json")
+
+
+def _evaluate(retrieve, eval_set):
+    hits, latencies = 0, []
+    for item in eval_set:
+        start = time.perf_counter()
+        docs = retrieve(item["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(item["expected"].lower() in doc.page_content.lower() for doc in docs)
+    return hits / len(eval_set), statistics.median(latencies), max(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=config.TOP_K_RESULTS)
+    args = parser.parse_args()
+
+    config.RETRIEVAL_MODE = "hybrid"
+    config.TOP_K_RESULTS = args.k
+
+    from rag import vector_store
+    if vector_store.get_vector_store() is None:
+        print("Vector store could not be initialized")
+        return
+
+    with open(EVAL_SET_PATH, "r", encoding="utf-8") as f:
+        eval_set = json.load(f)
+
+    dense = vector_store.get_dense_retriever()
+    hybrid = vector_store.get_retriever()
+    bm25 = vector_store._bm25_index
+
+    from rag.categories import infer_category
+
+    def category_filtered(question):
+        category = infer_category(question)
+        docs = vector_store.get_retriever(category).invoke(question)
+        if not docs and category:
+            docs = hybrid.invoke(question)
+        return docs
+
+    retrievers = [
+        ("dense (mmr)", dense.invoke),
+        ("bm25", lambda q: bm25.get_documents(q, args.k)),
+        ("hybrid (rrf)", hybrid.invoke),
+        ("hybrid+category", category_filtered),
+    ]
+
+    # Warm the embedding model so the first query isn't counted as a cold start
+    dense.invoke("warm up")
+
+    print(f"{len(eval_set)} questions, k={args.k}")
+    for label, retrieve in retrievers:
+        recall, median_ms, max_ms = _evaluate(retrieve, eval_set)
+        print(f"{label:<16} recall@{args.k} {recall:5.2f} | median {median_ms:7.2f} ms | max {max_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
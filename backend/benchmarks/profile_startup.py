@@ -0,0 +1,189 @@
+"""
+KLU Agent - Startup Profile
+Two views of cold start:
+
+  importtime   `python -X importtime -c "import main"` in a fresh process:
+               total import time and the slowest modules (self / cumulative).
+  first-chat   time-to-first-successful-chat in a fresh process: import main,
+               run the lifespan, and send /api/chat at once (it waits for
+               warm-up). The LLM is the scripted stub; embeddings and the
+               index are real, since loading them is what cold start costs.
+               --compare runs it without snapshots (no model snapshot, empty
+               index directory) and with them (after `python -m rag.snapshot`).
+
+Usage (from backend/):
+    python -m benchmarks.profile_startup importtime
+    python -m benchmarks.profile_startup first-chat --compare --runs 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_CHILD_START = time.perf_counter()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+# ============================================
+# Import-time Profile
+# ============================================
+
+def _parse_importtime(stderr: str) -> list:
+    """(module, self_us, cumulative_us, depth) rows from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def profile_imports(top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    rows = _parse_importtime(result.stderr)
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit("❌ import main failed")
+
+    main_us = next(cumulative for name, _, cumulative, depth in rows if name == "main" and depth == 0)
+    print(f"import main: {main_us / 1e6:.3f}s ({len(rows)} modules imported, interpreter startup included)\n")
+
+    print(f"{'cumulative s':>12}  module (top-level imports)")
+    top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: r[2], reverse=True)
+    for name, _, cumulative, _ in top_level[:top]:
+        print(f"{cumulative / 1e6:>12.3f}  {name}")
+
+    print(f"\n{'self s':>12}  module (slowest own import time)")
+    for name, self_us, _, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"{self_us / 1e6:>12.3f}  {name}")
+
+
+# ============================================
+# Time to First Successful Chat
+# ============================================
+
+async def _child_first_chat(latency: float) -> dict:
+    """Runs inside the measured process."""
+    import httpx
+    import rag.chain
+    from benchmarks.stub_llm import StubReActLLM
+
+    # Patch before the agent modules import get_llm from rag.chain
+    llm = StubReActLLM(latency=latency)
+    rag.chain.get_llm = lambda: llm
+
+    timings = {}
+    from main import app
+    timings["import_main_s"] = time.perf_counter() - _CHILD_START
+
+    async with app.router.lifespan_context(app):
+        timings["lifespan_s"] = time.perf_counter() - _CHILD_START
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup", timeout=None) as client:
+            while True:
+                response = await client.post("/api/chat", json={"message": "What is the KLUEEE exam?"})
+                if response.status_code == 200:
+                    break
+                await asyncio.sleep(0.05)
+            timings["first_chat_s"] = time.perf_counter() - _CHILD_START
+            # Chat opens before the index build ends; wait for the full warm-up report
+            while (ready := await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.05)
+            timings["warm_up"] = ready.json()
+
+    return {key: round(value, 3) if isinstance(value, float) else value for key, value in timings.items()}
+
+
+def _run_child(env_overrides: dict, latency: float) -> dict:
+    # The stub LLM answers; the key only has to pass the configuration check
+    env = {**os.environ, **env_overrides, "LLM_PROVIDER": "gemini",
+           "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY") or "offline-profile"}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.profile_startup", "child", "--latency", str(latency)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit("❌ Startup run failed")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_wall_s"] = round(wall, 3)
+    return timings
+
+
+def profile_first_chat(compare: bool, runs: int, latency: float):
+    from rag.snapshot import model_snapshot_path
+
+    scenarios = []
+    if compare:
+        scenarios.append(("no snapshot", True))
+    if model_snapshot_path() is None:
+        print("⚠️ No model snapshot found - run `python -m rag.snapshot` first for the snapshot numbers")
+    scenarios.append(("snapshot" if model_snapshot_path() else "configured", False))
+
+    print(f"{'scenario':<12} {'import main s':>13} {'lifespan s':>10} {'first chat s':>12} {'process s':>9}")
+    for name, cold in scenarios:
+        results = []
+        for _ in range(runs):
+            scratch = tempfile.mkdtemp(prefix="klu-startup-") if cold else None
+            overrides = {}
+            if cold:
+                overrides = {
+                    "EMBEDDING_SNAPSHOT_DIR": "",
+                    "NUMPY_INDEX_DIR": os.path.join(scratch, "numpy_index"),
+                    "CHROMA_PERSIST_DIR": os.path.join(scratch, "chroma_db"),
+                }
+            try:
+                results.append(_run_child(overrides, latency))
+            finally:
+                if scratch:
+                    shutil.rmtree(scratch, ignore_errors=True)
+
+        median = lambda key: statistics.median(r[key] for r in results)
+        print(f"{name:<12} {median('import_main_s'):>13.3f} {median('lifespan_s'):>10.3f} "
+              f"{median('first_chat_s'):>12.3f} {median('process_wall_s'):>9.3f}")
+        for component, info in results[-1]["warm_up"].get("components", {}).items():
+            print(f"{'':<12}   warm-up {component}: {info['seconds']}s ({info['status']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    imports = sub.add_parser("importtime", help="Import-time profile of `import main`")
+    imports.add_argument("--top", type=int, default=15)
+    first_chat = sub.add_parser("first-chat", help="Time to first successful chat")
+    first_chat.add_argument("--compare", action="store_true", help="Also run without model/index snapshots")
+    first_chat.add_argument("--runs", type=int, default=3)
+    first_chat.add_argument("--latency", type=float, default=0.05, help="Simulated LLM latency per call (s)")
+    child = sub.add_parser("child", help=argparse.SUPPRESS)
+    child.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if args.command == "importtime":
+        profile_imports(args.top)
+    elif args.command == "first-chat":
+        profile_first_chat(args.compare, args.runs, args.latency)
+    else:
+        import contextlib
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            timings = asyncio.run(_child_first_chat(args.latency))
+        print(json.dumps(timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+KLU Agent - Stub Embeddings for Benchmarks
+Deterministic, offline stand-in for the sentence-transformers model: each
+word is hashed into a signed bucket of a 384-d vector (the MiniLM size),
+then the vector is L2-normalized. Texts sharing words get similar vectors,
+which is enough for retrieval, routing and the semantic cache to behave
+realistically without downloading a model.
+"""
+
+import re
+import zlib
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words feature hashing embeddings."""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = zlib.crc32(word.encode("utf-8"))
+            vector[digest % self.dimensions] += 1.0 if digest & 0x80000000 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+
+def install_stub_embeddings(dimensions: int = 384):
+    """Make get_embedding_model() return the hashing model (behind the usual query cache)."""
+    import config
+    import rag.embeddings
+
+    model = rag.embeddings.CachedEmbeddings(
+        base=HashingEmbeddings(dimensions),
+        model_name="stub-hashing",
+        max_bytes=config.EMBEDDING_CACHE_MAX_MB * 1024 * 1024
+    )
+    rag.embeddings._embedding_model = model
+    return model
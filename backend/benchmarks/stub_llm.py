@@ -0,0 +1,147 @@
+"""
+KLU Agent - Stub LLM for Benchmarks
+Deterministic, offline stand-ins for the Gemini/OpenAI client. They replay
+a scripted trace (the tool calls a question needs, then a final answer)
+with a fixed simulated latency, so benchmarks measure our own overhead
+rather than the network. StubReActLLM speaks the text ReAct format (one
+tool per step); StubToolCallingLLM emits native tool calls, all in one step.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.llms import LLM
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+# (keyword, tool, tool input) - first match wins
+SCRIPTED_ACTIONS = [
+    ("hostel", "QueryHostel", "hostel"),
+    ("event", "QueryEvents", "workshop"),
+    ("workshop", "QueryEvents", "workshop"),
+    ("department", "QueryDepartments", "CSE"),
+    ("course", "QueryCourses", "CSE"),
+    ("fee", "QueryCourses", "B.Tech"),
+]
+DEFAULT_ACTION = ("QueryFAQs", "KLUEEE")
+
+
+def _last_question(prompt: str) -> str:
+    """Extract the user question from a rendered ReAct prompt."""
+    matches = re.findall(r"^Question: (.*)$", prompt, flags=re.MULTILINE)
+    return matches[-1] if matches else prompt
+
+
+def _scripted_action(question: str):
+    """Pick the scripted tool call for a question."""
+    lowered = question.lower()
+    for keyword, tool, tool_input in SCRIPTED_ACTIONS:
+        if keyword in lowered:
+            return tool, tool_input
+    return DEFAULT_ACTION
+
+
+def _scripted_actions(question: str):
+    """
+    All tool calls a question needs: one QueryCourses per department it
+    names ("compare CSE and ECE fees"), plus hostel / events lookups.
+    Simple questions get the single scripted action.
+    """
+    actions = [("QueryCourses", code) for code in re.findall(r"\b(CSE|ECE|EEE|ME|CE|IT|MBA|BT)\b", question)]
+    lowered = question.lower()
+    if "hostel" in lowered:
+        actions.append(("QueryHostel", "hostel"))
+    if "event" in lowered or "workshop" in lowered:
+        actions.append(("QueryEvents", "workshop"))
+    if len(actions) <= 1:
+        return [_scripted_action(question)]
+    return actions
+
+
+class StubReActLLM(LLM):
+    """Scripted LLM that emits a deterministic one-tool ReAct trace."""
+
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-react"
+
+    calls: int = 0
+
+    def _respond(self, prompt: str) -> str:
+        self.calls += 1
+        question = _last_question(prompt)
+        scratchpad = prompt.rsplit("Question: ", 1)[-1]
+        actions = _scripted_actions(question)
+        done = scratchpad.count("Observation:")
+        if done >= len(actions):
+            return (
+                "I now know the final answer\n"
+                f"Final Answer: Here is what I found about '{question}'."
+            )
+        tool, tool_input = actions[done]
+        return (
+            f"I should use {tool} to answer this.\n"
+            f"Action: {tool}\n"
+            f"Action Input: {tool_input}"
+        )
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        time.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def _acall(self, prompt: str, stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> str:
+        await asyncio.sleep(self.latency)
+        return self._respond(prompt)
+
+
+class StubToolCallingLLM(BaseChatModel):
+    """Scripted chat model that requests every needed tool call in one step."""
+
+    latency: float = 0.2
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-tool-calling"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _respond(self, messages) -> ChatResult:
+        self.calls += 1
+        question = next((m.content for m in messages if m.type == "human"), "")
+        if any(isinstance(m, ToolMessage) for m in messages):
+            message = AIMessage(content=f"Here is what I found about '{question}'.")
+        else:
+            message = AIMessage(content="", tool_calls=[
+                {"name": tool, "args": {"query": tool_input}, "id": f"call_{i}"}
+                for i, (tool, tool_input) in enumerate(_scripted_actions(question))
+            ])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+def install_stub_llm(latency: float = 0.2, mode: str = "react"):
+    """Replace get_llm() everywhere it has been imported with the stub."""
+    import config
+    import rag.chain
+    import agents.klu_agent
+
+    config.AGENT_MODE = mode
+    llm = StubToolCallingLLM(latency=latency) if mode == "tools" else StubReActLLM(latency=latency)
+    rag.chain.get_llm = lambda: llm
+    agents.klu_agent.get_llm = lambda: llm
+    agents.klu_agent.reset_agent_registry()
+    return llm
@@ -28,17 +28,54 @@ OPENAI_MODEL = "gpt-3.5-turbo"
 # Embedding Configuration
 # ============================================
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "torch" (sentence-transformers on PyTorch) or "onnx" (ONNX Runtime with int8
+# dynamic quantization; needs onnxruntime, falls back to torch without it)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", str(BASE_DIR / "onnx_model"))
+
+# Query-embedding cache (exact match on normalized text, LRU eviction)
+EMBEDDING_CACHE_MAX_MB = int(os.getenv("EMBEDDING_CACHE_MAX_MB", 32))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")  # e.g. ./embedding_cache.npz; empty = memory only
+
+# Micro-batching of concurrent query embeddings: a batch runs once
+# EMBEDDING_BATCH_MAX_SIZE queries are waiting or after EMBEDDING_BATCH_MAX_WAIT_MS
+EMBEDDING_BATCHING_ENABLED = os.getenv("EMBEDDING_BATCHING_ENABLED", "true").lower() == "true"
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", 32))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", 2))
+
+# Local copy of the embedding model written by `python -m rag.snapshot`; when
+# present it is loaded from disk instead of being resolved through the HF hub
+EMBEDDING_SNAPSHOT_DIR = os.getenv("EMBEDDING_SNAPSHOT_DIR", str(BASE_DIR / "model_snapshot"))
 
 # ============================================
-# ChromaDB Configuration
+# Vector Store Configuration
 # ============================================
 CHROMA_PERSIST_DIR = os.getenv("CHROMA_PERSIST_DIR", str(BASE_DIR / "chroma_db"))
 CHROMA_COLLECTION_NAME = "klu_knowledge"
 
+# "chroma" or "numpy" (in-process memory-mapped matrix, exact search; good for small corpora)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", str(BASE_DIR / "numpy_index"))
+
 # ============================================
 # Database Configuration
 # ============================================
 DATABASE_URL = f"sqlite:///{BASE_DIR / 'klu_college.db'}"
+# Max rows returned by full-text (FTS5) lookups in the database tools
+FTS_RESULT_LIMIT = int(os.getenv("FTS_RESULT_LIMIT", 20))
+# Memoized database tool results (per tool LRU, dropped on any DB write)
+TOOL_CACHE_ENABLED = os.getenv("TOOL_CACHE_ENABLED", "true").lower() == "true"
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", 256))
+
+# ============================================
+# Conversation Memory
+# ============================================
+CONVERSATIONS_DATABASE_URL = f"sqlite:///{BASE_DIR / 'conversations.db'}"
+# Recent exchanges kept verbatim; older ones are folded into a rolling summary
+MEMORY_WINDOW_TURNS = int(os.getenv("MEMORY_WINDOW_TURNS", 3))
+MEMORY_SUMMARY_MAX_TOKENS = int(os.getenv("MEMORY_SUMMARY_MAX_TOKENS", 200))
+MEMORY_HOT_CONVERSATIONS = int(os.getenv("MEMORY_HOT_CONVERSATIONS", 500))
+MEMORY_TTL_SECONDS = int(os.getenv("MEMORY_TTL_SECONDS", 7 * 24 * 3600))
 
 # ============================================
 # Document Storage
@@ -50,6 +87,9 @@ DOCUMENTS_DIR = str(BASE_DIR / "data" / "documents")
 # ============================================
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000))
+# Chat requests arriving while the LLM and embedding model load wait this long
+# before a 503 (a first vector index build does not hold chat)
+READY_TIMEOUT_SECONDS = int(os.getenv("READY_TIMEOUT_SECONDS", 60))
 
 # ============================================
 # RAG Configuration
@@ -58,3 +98,54 @@ CHUNK_SIZE = 800
 CHUNK_OVERLAP = 200
 TOP_K_RESULTS = 5
 TEMPERATURE = 0.3
+# "react" (text ReAct loop, one tool per step) or "tools" (native tool calling;
+# several tool calls per step, executed concurrently)
+AGENT_MODE = os.getenv("AGENT_MODE", "react")
+# "dense" (Chroma MMR only) or "hybrid" (BM25 + dense, reciprocal rank fusion)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+# Drop a retrieved chunk when this share of its tokens already appears in a higher-ranked one
+REDUNDANCY_THRESHOLD = float(os.getenv("REDUNDANCY_THRESHOLD", 0.8))
+# Max tokens of retrieved context per prompt / tool observation
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+
+# ============================================
+# Ingestion Configuration
+# ============================================
+# Worker processes for PDF parsing and bulk embedding
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", min(4, os.cpu_count() or 1)))
+# Only spin up embedding worker processes when this many PDFs changed
+INGEST_PARALLEL_MIN_FILES = int(os.getenv("INGEST_PARALLEL_MIN_FILES", 4))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", 512))
+# Skip exact and near-duplicate chunks (MinHash Jaccard >= threshold) at ingest
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_NEAR_THRESHOLD = float(os.getenv("DEDUP_NEAR_THRESHOLD", 0.85))
+
+# ============================================
+# Concurrency Configuration
+# ============================================
+# Threads available for blocking work (DB queries, vector search, embeddings)
+AGENT_WORKER_THREADS = int(os.getenv("AGENT_WORKER_THREADS", 16))
+
+# ============================================
+# Semantic Answer Cache Configuration
+# ============================================
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))  # cosine similarity
+SEMANTIC_CACHE_TTL_SECONDS = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 3600))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 1000))
+
+# ============================================
+# FAQ Answer Index Configuration
+# ============================================
+# Messages this similar to a curated FAQ question get its answer directly (no LLM call)
+FAQ_INDEX_ENABLED = os.getenv("FAQ_INDEX_ENABLED", "true").lower() == "true"
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", 0.85))  # cosine similarity
+
+# ============================================
+# Fast-Path Router Configuration
+# ============================================
+ROUTER_ENABLED = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+# confidence = keyword weight + (1 - weight) * best example similarity
+ROUTER_KEYWORD_WEIGHT = float(os.getenv("ROUTER_KEYWORD_WEIGHT", 0.5))
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", 0.75))
@@ -0,0 +1,305 @@
+"""
+KLU Agent - Conversation Memory Module
+Persists chat history per conversation_id in its own SQLite database (next
+to klu_college.db) with an in-memory LRU hot tier. The agent sees a sliding
+window of recent turns plus a rolling summary of everything older, so the
+prompt stays roughly constant in size as a conversation grows. Idle
+conversations are evicted after a TTL.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from sqlalchemy import create_engine, Column, Integer, String, Float, Text, Boolean, ForeignKey
+from sqlalchemy.orm import declarative_base, sessionmaker
+import config
+
+MemoryBase = declarative_base()
+
+
+# ============================================
+# Database Models
+# ============================================
+
+class Conversation(MemoryBase):
+    __tablename__ = "conversations"
+
+    id = Column(String(100), primary_key=True)
+    summary = Column(Text, default="")
+    updated_at = Column(Float, index=True)
+
+
+class ConversationMessage(MemoryBase):
+    __tablename__ = "conversation_messages"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    conversation_id = Column(String(100), ForeignKey("conversations.id"), index=True)
+    role = Column(String(20))  # user, assistant
+    content = Column(Text)
+    created_at = Column(Float)
+    summarized = Column(Boolean, default=False)  # folded into the rolling summary
+
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a student and the KL University assistant.
+Keep facts the student shared, what they asked about, and key answers (names, fees, dates). At most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+# Messages in the window are clipped so one long answer can't dominate the prompt
+MAX_MESSAGE_CHARS = 600
+
+
+class ConversationStore:
+    """SQLite-backed conversation history with an LRU cache of active conversations."""
+
+    def __init__(self, database_url: str, window_turns: int, summary_max_tokens: int,
+                 hot_conversations: int, ttl_seconds: int):
+        self.window_messages = window_turns * 2
+        self.summary_max_tokens = summary_max_tokens
+        self.hot_conversations = hot_conversations
+        self.ttl_seconds = ttl_seconds
+        self.engine = create_engine(database_url, echo=False)
+        self.Session = sessionmaker(bind=self.engine)
+        MemoryBase.metadata.create_all(bind=self.engine)
+
+        self._hot = OrderedDict()   # conversation_id -> {"summary", "messages", "updated_at"}
+        self._hot_lock = threading.Lock()
+        # Striped per-conversation locks: a read waits for a pending write of the same conversation
+        self._locks = [threading.Lock() for _ in range(64)]
+        self._last_eviction = 0.0
+        self.evicted = 0
+
+    def _lock_for(self, conversation_id: str) -> threading.Lock:
+        return self._locks[hash(conversation_id) % len(self._locks)]
+
+    # ----- hot tier -----
+
+    def _load(self, conversation_id: str) -> dict:
+        """Get a conversation from the hot tier, loading it from SQLite on a miss."""
+        with self._hot_lock:
+            state = self._hot.get(conversation_id)
+            if state is not None:
+                self._hot.move_to_end(conversation_id)
+                return state
+
+        session = self.Session()
+        try:
+            row = session.get(Conversation, conversation_id)
+            messages = (
+                session.query(ConversationMessage)
+                .filter(ConversationMessage.conversation_id == conversation_id,
+                        ConversationMessage.summarized == False)
+                .order_by(ConversationMessage.id)
+                .all()
+            )
+            state = {
+                "summary": row.summary if row else "",
+                "messages": [(m.id, m.role, m.content) for m in messages],
+                "updated_at": row.updated_at if row else time.time(),
+            }
+        finally:
+            session.close()
+
+        with self._hot_lock:
+            self._hot[conversation_id] = state
+            while len(self._hot) > self.hot_conversations:
+                self._hot.popitem(last=False)
+        return state
+
+    # ----- public API -----
+
+    def get_history(self, conversation_id: str) -> str:
+        """Rolling summary plus the recent window, formatted for the agent prompt."""
+        with self._lock_for(conversation_id):
+            state = self._load(conversation_id)
+            if time.time() - state["updated_at"] > self.ttl_seconds:
+                # Expired but not yet swept: start the conversation over
+                self._delete([conversation_id])
+                return ""
+
+            lines = []
+            if state["summary"]:
+                lines.append(f"Summary of earlier conversation: {state['summary']}")
+            for _, role, content in state["messages"]:
+                if len(content) > MAX_MESSAGE_CHARS:
+                    content = content[:MAX_MESSAGE_CHARS] + "…"
+                lines.append(f"{'Student' if role == 'user' else 'KLU Agent'}: {content}")
+            return "\n".join(lines)
+
+    def append_turn(self, conversation_id: str, user_message: str, answer: str):
+        """
+        Record one exchange, folding turns that leave the window into the summary.
+
+        The summary LLM call runs with no lock or transaction held: the turn
+        is committed first, and the summary is applied in a second short
+        transaction if no other write folded the same messages meanwhile.
+        """
+        now = time.time()
+        with self._lock_for(conversation_id):
+            state = self._load(conversation_id)
+            with self._write(conversation_id) as session:
+                row = session.get(Conversation, conversation_id)
+                if row is None:
+                    row = Conversation(id=conversation_id, summary="")
+                    session.add(row)
+
+                new_messages = [
+                    ConversationMessage(conversation_id=conversation_id, role="user",
+                                        content=user_message, created_at=now),
+                    ConversationMessage(conversation_id=conversation_id, role="assistant",
+                                        content=answer, created_at=now),
+                ]
+                session.add_all(new_messages)
+                row.updated_at = now
+                session.flush()
+                state["messages"].extend((m.id, m.role, m.content) for m in new_messages)
+                state["updated_at"] = now
+
+            previous_summary = state["summary"]
+            overflow = list(state["messages"][:-self.window_messages or None]) \
+                if len(state["messages"]) > self.window_messages else []
+
+        if overflow:
+            summary = self._summarize(previous_summary, overflow)
+            with self._lock_for(conversation_id):
+                state = self._load(conversation_id)
+                # Skip if a concurrent turn already folded these messages
+                if state["summary"] == previous_summary and state["messages"][:len(overflow)] == overflow:
+                    with self._write(conversation_id) as session:
+                        (session.query(ConversationMessage)
+                            .filter(ConversationMessage.id.in_([message_id for message_id, _, _ in overflow]))
+                            .update({"summarized": True}, synchronize_session=False))
+                        session.query(Conversation).filter(Conversation.id == conversation_id) \
+                            .update({"summary": summary}, synchronize_session=False)
+                    state["summary"] = summary
+                    state["messages"] = state["messages"][len(overflow):]
+
+        if now - self._last_eviction > 60:
+            self._last_eviction = now
+            self.evict_expired()
+
+    @contextmanager
+    def _write(self, conversation_id: str):
+        """A short write transaction; on failure the hot copy is dropped (SQLite stays authoritative)."""
+        session = self.Session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            with self._hot_lock:
+                self._hot.pop(conversation_id, None)
+            raise
+        finally:
+            session.close()
+
+    def _summarize(self, summary: str, messages) -> str:
+        """Fold messages into the rolling summary (LLM, with an extractive fallback)."""
+        from rag.context import count_tokens
+
+        transcript = "\n".join(
+            f"{'Student' if role == 'user' else 'KLU Agent'}: {content[:MAX_MESSAGE_CHARS]}"
+            for _, role, content in messages
+        )
+        try:
+            from rag.chain import get_llm
+            from langchain.schema.output_parser import StrOutputParser
+            prompt = SUMMARY_PROMPT.format(
+                max_words=int(self.summary_max_tokens * 0.75),
+                summary=summary or "(none)",
+                messages=transcript
+            )
+            new_summary = (get_llm() | StrOutputParser()).invoke(prompt).strip()
+        except Exception as e:
+            print(f"⚠️ Conversation summary failed, keeping recent questions only: {e}")
+            questions = [content for _, role, content in messages if role == "user"]
+            new_summary = " ".join(filter(None, [summary, "Student asked: " + " | ".join(questions)]))
+
+        # Hard cap so the summary can't grow without bound
+        while count_tokens(new_summary) > self.summary_max_tokens and " " in new_summary:
+            new_summary = new_summary.split(" ", 1)[1]
+        return new_summary
+
+    def _delete(self, conversation_ids):
+        session = self.Session()
+        try:
+            (session.query(ConversationMessage)
+                .filter(ConversationMessage.conversation_id.in_(conversation_ids))
+                .delete(synchronize_session=False))
+            session.query(Conversation).filter(Conversation.id.in_(conversation_ids)).delete(synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+
+        with self._hot_lock:
+            for conversation_id in conversation_ids:
+                self._hot.pop(conversation_id, None)
+
+    def evict_expired(self) -> int:
+        """Delete conversations idle for longer than the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        session = self.Session()
+        try:
+            expired = [row.id for row in session.query(Conversation.id).filter(Conversation.updated_at < cutoff)]
+        finally:
+            session.close()
+
+        with self._hot_lock:
+            expired = set(expired) | {cid for cid, state in self._hot.items() if state["updated_at"] < cutoff}
+
+        if expired:
+            self._delete(list(expired))
+            self.evicted += len(expired)
+            print(f"🧹 Evicted {len(expired)} idle conversations")
+        return len(expired)
+
+    def stats(self) -> dict:
+        with self._hot_lock:
+            hot = list(self._hot.values())
+        hot_bytes = sum(
+            sys.getsizeof(state["summary"]) + sum(sys.getsizeof(content) for _, _, content in state["messages"])
+            for state in hot
+        )
+
+        session = self.Session()
+        try:
+            stored = session.query(Conversation).count()
+        finally:
+            session.close()
+
+        return {
+            "hot_conversations": len(hot),
+            "hot_memory_kb": round(hot_bytes / 1024, 1),
+            "stored_conversations": stored,
+            "evicted": self.evicted,
+        }
+
+
+_conversation_store = None
+_conversation_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    """Get or create the conversation store (singleton pattern)."""
+    global _conversation_store
+
+    if _conversation_store is None:
+        with _conversation_store_lock:
+            if _conversation_store is None:
+                _conversation_store = ConversationStore(
+                    database_url=config.CONVERSATIONS_DATABASE_URL,
+                    window_turns=config.MEMORY_WINDOW_TURNS,
+                    summary_max_tokens=config.MEMORY_SUMMARY_MAX_TOKENS,
+                    hot_conversations=config.MEMORY_HOT_CONVERSATIONS,
+                    ttl_seconds=config.MEMORY_TTL_SECONDS
+                )
+
+    return _conversation_store
@@ -4,9 +4,11 @@ SQLite database with structured college data for SQL-based queries.
 The agent can query this database for real-time structured data.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, Boolean, ForeignKey
+import re
+import threading
+from sqlalchemy import create_engine, event, text, Column, Integer, String, Float, Text, Boolean, ForeignKey
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
-from config import DATABASE_URL
+from config import DATABASE_URL, FTS_RESULT_LIMIT
 
 Base = declarative_base()
 engine = create_engine(DATABASE_URL, echo=False)
@@ -90,13 +92,193 @@ class FAQ(Base):
     category = Column(String(50))
 
 
+# ============================================
+# Change Tracking
+# ============================================
+# Every committed write through SessionLocal bumps the data generation so
+# caches built on top of the database can tell when they are stale.
+
+_data_generation = 0
+_data_generation_lock = threading.Lock()
+
+
+def get_data_generation() -> int:
+    """Return the current data generation counter."""
+    return _data_generation
+
+
+def bump_data_generation():
+    """Mark the database contents as changed."""
+    global _data_generation
+    with _data_generation_lock:
+        _data_generation += 1
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_flush(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info["data_changed"] = True
+
+
+@event.listens_for(SessionLocal, "after_bulk_update")
+@event.listens_for(SessionLocal, "after_bulk_delete")
+def _track_bulk_write(update_context):
+    update_context.session.info["data_changed"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop("data_changed", False):
+        bump_data_generation()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop("data_changed", None)
+
+
+# ============================================
+# Full-Text Search (SQLite FTS5)
+# ============================================
+# External-content FTS5 tables mirror the searchable columns of each model
+# and are kept in sync by triggers. Column weights feed bm25() ranking.
+
+FTS_TABLES = {
+    "faqs": {"question": 3.0, "answer": 1.0, "category": 2.0},
+    "events": {"name": 3.0, "event_type": 2.0, "description": 1.0, "venue": 1.0},
+    "courses": {"name": 3.0, "code": 3.0, "level": 2.0, "description": 1.0},
+    "departments": {"name": 3.0, "code": 3.0, "hod": 1.0, "description": 1.0},
+    "hostel_info": {"hostel_name": 3.0, "hostel_type": 3.0, "room_type": 2.0, "amenities": 1.0},
+}
+
+# Porter stemming so plural/inflected forms match ("scholarships" ~ "scholarship")
+FTS_TOKENIZER = "porter unicode61 remove_diacritics 2"
+
+FTS_STOPWORDS = {
+    "a", "an", "and", "are", "at", "be", "can", "do", "does", "for", "from", "how", "i", "in",
+    "is", "me", "much", "of", "on", "or", "show", "tell", "the", "there", "to", "what", "when",
+    "where", "which", "who", "with", "about", "any", "list", "all", "my", "you", "your",
+}
+
+fts_available = False
+
+
+def _fts_name(table: str) -> str:
+    return f"{table}_fts"
+
+
+def init_fts(bind=None):
+    """Create FTS5 mirrors and sync triggers; fall back to LIKE search if FTS5 is missing."""
+    global fts_available
+
+    try:
+        with (bind or engine).begin() as conn:
+            for table, weights in FTS_TABLES.items():
+                fts = _fts_name(table)
+                cols = list(weights)
+                col_list = ", ".join(cols)
+                new_vals = ", ".join(f"new.{c}" for c in cols)
+                old_vals = ", ".join(f"old.{c}" for c in cols)
+
+                existing = conn.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": fts}
+                ).first()
+                exists = existing is not None
+                if exists and FTS_TOKENIZER not in existing[0]:
+                    # Built with an older tokenizer: recreate and re-index it
+                    conn.exec_driver_sql(f"DROP TABLE {fts}")
+                    exists = False
+
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                    f"{col_list}, content='{table}', content_rowid='id', "
+                    f"tokenize='{FTS_TOKENIZER}', prefix='2 3')"
+                )
+                conn.exec_driver_sql(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals}); END"
+                )
+                conn.exec_driver_sql(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); END"
+                )
+                conn.exec_driver_sql(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals}); "
+                    f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals}); END"
+                )
+
+                if not exists:
+                    # Index rows that were written before the FTS table existed
+                    conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+        fts_available = True
+    except Exception as e:
+        fts_available = False
+        print(f"⚠️ SQLite FTS5 unavailable, using LIKE search: {e}")
+
+
+def _fts_tokens(query: str) -> list:
+    tokens = re.findall(r"\w+", query.lower())
+    return [t for t in tokens if len(t) > 1 and t not in FTS_STOPWORDS]
+
+
+def fts_search(session, table: str, query: str, limit: int = None, where: str = None):
+    """
+    Rank rows of `table` against free text with FTS5 bm25.
+
+    All terms must match first (AND); if that finds nothing, any term may
+    match (OR). Terms are Porter-stemmed and prefix-matched, so "fee" and
+    "fees" find each other, as do "workshop" and "workshops".
+
+    Returns:
+        list of row ids, best first, or None if FTS can't be used for this
+        query (FTS5 unavailable or no searchable terms) - callers should
+        then fall back to LIKE search.
+    """
+    if not fts_available:
+        return None
+
+    tokens = _fts_tokens(query)
+    if not tokens:
+        return None
+
+    fts = _fts_name(table)
+    weights = ", ".join(str(w) for w in FTS_TABLES[table].values())
+    terms = [f'"{t}"*' for t in tokens]
+    sql = text(
+        f"SELECT t.id FROM {fts} JOIN {table} t ON t.id = {fts}.rowid "
+        f"WHERE {fts} MATCH :match {f'AND ({where})' if where else ''} "
+        f"ORDER BY bm25({fts}, {weights}) LIMIT :limit"
+    )
+
+    limit = limit or FTS_RESULT_LIMIT
+    for operator in (" AND ", " OR "):
+        ids = [row[0] for row in session.execute(sql, {"match": operator.join(terms), "limit": limit})]
+        if ids or len(terms) == 1:
+            return ids
+    return ids
+
+
+def load_in_order(session, model, ids: list, *options):
+    """Load model rows by id, preserving the order of `ids`."""
+    if not ids:
+        return []
+    query = session.query(model)
+    if options:
+        query = query.options(*options)
+    rows = {row.id: row for row in query.filter(model.id.in_(ids)).all()}
+    return [rows[i] for i in ids if i in rows]
+
+
 # ============================================
 # Database Initialization & Seeding
 # ============================================
 
 def init_db():
-    """Create all tables."""
+    """Create all tables and their full-text search indexes."""
     Base.metadata.create_all(engine)
+    init_fts()
 
 
 def seed_db():
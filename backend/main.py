@@ -5,12 +5,15 @@ RESTful API server for the KLU Agent chatbot.
 
 import sys
 import os
+import asyncio
+import json
+import threading
 import time
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, List
 
@@ -18,7 +21,9 @@ from typing import Optional, List
 sys.path.insert(0, os.path.dirname(__file__))
 
 import config
-from data.database import init_db, seed_db, SessionLocal, Event, FAQ
+from data.database import init_db, seed_db, get_data_generation, SessionLocal, Event, FAQ
+from metrics import CHAT_ANSWERS, HTTP_REQUEST_SECONDS, render_metrics
+from workers import SingleFlight, run_in_worker, shutdown_worker_pool
 
 
 # ============================================
@@ -42,6 +47,122 @@ class HealthResponse(BaseModel):
     llm_provider: str
     vector_store: str
     database: str
+    semantic_cache: Optional[dict] = None
+    faq_index: Optional[dict] = None
+    embedding_cache: Optional[dict] = None
+    router: Optional[dict] = None
+    memory: Optional[dict] = None
+    tool_cache: Optional[dict] = None
+    coalescing: Optional[dict] = None
+
+
+# ============================================
+# Startup Warm-up
+# ============================================
+
+# Set on the event loop once warm-up has finished (successfully or not)
+_ready_event = None
+# Set once chat can be served: the LLM agent and embedding model are loaded.
+# The vector index may still be building (SearchKnowledgeBase says so meanwhile).
+_chat_ready_event = None
+CHAT_COMPONENTS = ("agent", "embeddings")
+startup_state = {"ready": False, "started_at": None, "seconds": None, "components": {}}
+
+
+def _warm_vector_store() -> str:
+    print("Initializing RAG pipeline in background...")
+    from rag.vector_store import get_vector_store
+    if get_vector_store() is None:
+        return "failed - will retry on first query"
+    from agents.router import warm_routes
+    warm_routes()
+    return "ready"
+
+
+def _warm_embeddings() -> str:
+    from rag.embeddings import get_embedding_model
+    get_embedding_model().embed_query("KL University")
+    return "ready"
+
+
+def _warm_agent() -> str:
+    from agents.klu_agent import get_klu_agent
+    get_klu_agent()
+    # Otherwise imported by the first chat request
+    from rag.semantic_cache import get_answer_cache
+    get_answer_cache()
+    return "ready"
+
+
+def _warm_faq_index() -> str:
+    from rag.faq_index import get_faq_index
+    index = get_faq_index()
+    if index is None:
+        return "disabled"
+    index.refresh()
+    return "ready"
+
+
+def _warm_up(loop):
+    """Load the index/embedding model, build the agent and FAQ index in parallel, then mark ready."""
+    components = {}
+
+    def mark_chat_ready():
+        if not _chat_ready_event.is_set():
+            _chat_ready_event.set()
+            print(f"💬 Chat is open ({round(time.time() - startup_state['started_at'], 3)}s)")
+
+    def run(name, func):
+        start = time.perf_counter()
+        try:
+            status = func()
+        except Exception as e:
+            status = f"failed: {e}"
+        components[name] = {"status": status, "seconds": round(time.perf_counter() - start, 3)}
+        print(f"{'✅' if status in ('ready', 'disabled') else '⚠️'} Warm-up {name}: {status}")
+        if all(component in components for component in CHAT_COMPONENTS):
+            loop.call_soon_threadsafe(mark_chat_ready)
+
+    threads = [
+        threading.Thread(target=run, args=("vector_store", _warm_vector_store), daemon=True),
+        threading.Thread(target=run, args=("embeddings", _warm_embeddings), daemon=True),
+        threading.Thread(target=run, args=("agent", _warm_agent), daemon=True),
+        threading.Thread(target=run, args=("faq_index", _warm_faq_index), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    def mark_ready():
+        startup_state.update(
+            ready=True,
+            seconds=round(time.time() - startup_state["started_at"], 3),
+            components=components
+        )
+        _ready_event.set()
+        mark_chat_ready()
+        print(f"KLU Agent Backend is ready! ({startup_state['seconds']}s)")
+
+    loop.call_soon_threadsafe(mark_ready)
+
+
+async def _wait_until_ready():
+    """
+    Hold a chat request until the LLM agent and embedding model are loaded
+    (503 after READY_TIMEOUT_SECONDS). A slow first index build does not
+    hold chat: it only gates /ready.
+    """
+    if _chat_ready_event is None or _chat_ready_event.is_set():
+        return
+    try:
+        await asyncio.wait_for(_chat_ready_event.wait(), timeout=config.READY_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail="KLU Agent is still starting up. Please try again in a moment.",
+            headers={"Retry-After": "5"}
+        )
 
 
 # ============================================
@@ -51,6 +172,7 @@ class HealthResponse(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize resources on startup, cleanup on shutdown."""
+    global _ready_event, _chat_ready_event
     print("Starting KLU Agent Backend...")
 
     # Initialize database (fast - keep synchronous)
@@ -59,29 +181,27 @@ async def lifespan(app: FastAPI):
     seed_db()
     print("Database ready!")
 
-    # Initialize vector store in background thread (slow - don't block startup)
-    import threading
-    def _init_rag():
-        try:
-            print("Initializing RAG pipeline in background...")
-            from rag.vector_store import get_vector_store
-            store = get_vector_store()
-            if store:
-                print("Vector store ready!")
-            else:
-                print("Vector store initialization failed - will retry on first query")
-        except Exception as e:
-            print(f"Vector store pre-loading failed: {e}")
-
-    threading.Thread(target=_init_rag, daemon=True).start()
+    # Warm up the RAG pipeline and agent in background threads (slow - don't
+    # block startup). Chat requests wait for the LLM and embeddings only;
+    # /ready reports the whole warm-up, index build included.
+    loop = asyncio.get_running_loop()
+    _ready_event = asyncio.Event()
+    _chat_ready_event = asyncio.Event()
+    startup_state.update(ready=False, started_at=time.time(), seconds=None, components={})
+    threading.Thread(target=_warm_up, args=(loop,), daemon=True).start()
 
-    print("KLU Agent Backend is ready!")
+    print("KLU Agent Backend is accepting requests (warming up in background)")
     print(f"API running at http://localhost:{config.PORT}")
     print(f"LLM Provider: {config.LLM_PROVIDER}")
 
     yield
 
     print("Shutting down KLU Agent Backend...")
+    shutdown_worker_pool()
+
+    if "rag.embeddings" in sys.modules:
+        from rag.embeddings import save_embedding_cache
+        save_embedding_cache()
 
 
 # ============================================
@@ -104,6 +224,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Per-endpoint latency histogram (streaming responses: time to first byte)."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not the raw URL, to keep the series bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            path=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
+
 # Serve static frontend files
 frontend_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)))
 if os.path.exists(os.path.join(frontend_dir, "index.html")):
@@ -135,47 +276,107 @@ async def serve_js():
     return FileResponse(os.path.join(frontend_dir, "app.js"), media_type="application/javascript")
 
 
-@app.get("/health", response_model=HealthResponse)
-async def health_check():
-    """Check the health of all system components."""
-    # Check database
-    db_status = "healthy"
+def _check_database() -> str:
+    """Ping the SQLite database."""
     try:
         session = SessionLocal()
         session.execute(
             __import__('sqlalchemy').text("SELECT 1")
         )
         session.close()
+        return "healthy"
     except Exception:
-        db_status = "unhealthy"
+        return "unhealthy"
 
-    # Check vector store
-    vs_status = "not initialized"
+
+def _check_vector_store() -> str:
+    """Report the vector store status without triggering initialization."""
     try:
         from rag.vector_store import _vector_store
+        from rag.backends import count_chunks
         if _vector_store is not None:
-            count = _vector_store._collection.count()
-            vs_status = f"healthy ({count} documents)"
+            count = count_chunks(_vector_store)
+            return f"healthy ({count} documents)"
+        return "not initialized"
     except Exception:
-        vs_status = "error"
+        return "error"
+
+
+@app.get("/health", response_model=HealthResponse)
+async def health_check():
+    """Check the health of all system components."""
+    db_status = await run_in_worker(_check_database)
+    vs_status = await run_in_worker(_check_vector_store)
+
+    cache_stats = None
+    try:
+        from rag.semantic_cache import _answer_cache
+        if _answer_cache is not None:
+            cache_stats = _answer_cache.stats()
+    except Exception:
+        pass
+
+    embedding_stats = None
+    try:
+        from rag.embeddings import _embedding_model
+        if _embedding_model is not None:
+            embedding_stats = _embedding_model.stats()
+    except Exception:
+        pass
+
+    faq_stats = None
+    if "rag.faq_index" in sys.modules:
+        faq_index = sys.modules["rag.faq_index"]._faq_index
+        if faq_index is not None:
+            faq_stats = faq_index.stats()
+
+    router_snapshot = None
+    if "agents.router" in sys.modules:
+        router_snapshot = sys.modules["agents.router"].router_stats.snapshot()
+
+    tool_cache_stats = None
+    if "agents.tool_cache" in sys.modules:
+        tool_cache_stats = sys.modules["agents.tool_cache"].tool_cache.stats()
+
+    memory_stats = None
+    if "data.conversations" in sys.modules:
+        store = sys.modules["data.conversations"]._conversation_store
+        if store is not None:
+            memory_stats = await run_in_worker(store.stats)
 
     return HealthResponse(
         status="running",
         llm_provider=config.LLM_PROVIDER,
         vector_store=vs_status,
-        database=db_status
+        database=db_status,
+        semantic_cache=cache_stats,
+        faq_index=faq_stats,
+        embedding_cache=embedding_stats,
+        router=router_snapshot,
+        memory=memory_stats,
+        tool_cache=tool_cache_stats,
+        coalescing=chat_flights.stats()
     )
 
 
-@app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    """
-    Main chat endpoint. Sends user message to the KLU Agent
-    and returns a grounded response.
-    """
-    start_time = time.time()
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 200 once warm-up has finished, 503 while starting."""
+    state = {**startup_state, "ready": _ready_event is None or _ready_event.is_set(),
+             "chat_ready": _chat_ready_event is None or _chat_ready_event.is_set()}
+    if state["started_at"] and not state["ready"]:
+        state["waiting_seconds"] = round(time.time() - state["started_at"], 3)
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
 
-    # Validate API key is configured
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-stage latency histograms and counters in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+def _check_llm_configured():
+    """Raise if the configured LLM provider has no API key."""
     if config.LLM_PROVIDER == "gemini" and not config.GOOGLE_API_KEY:
         raise HTTPException(
             status_code=500,
@@ -187,9 +388,146 @@ async def chat(request: ChatRequest):
             detail="OpenAI API key not configured. Please set OPENAI_API_KEY in the .env file."
         )
 
+
+async def _lookup_cached_answer(message: str):
+    """
+    Check the semantic answer cache.
+
+    Returns:
+        (cached result or None, query embedding or None)
+    """
+    from rag.semantic_cache import get_answer_cache
+    cache = get_answer_cache()
+    if cache is None:
+        return None, None
+
     try:
-        from agents.klu_agent import run_agent
-        result = run_agent(request.message)
+        embedding = await run_in_worker(cache.embed, message)
+        return cache.lookup(message, embedding), embedding
+    except Exception as e:
+        print(f"⚠️ Semantic cache unavailable: {e}")
+        return None, None
+
+
+async def _lookup_faq_answer(message: str, embedding):
+    """The curated answer of a closely matching FAQ question, or None."""
+    from rag.faq_index import get_faq_index
+    index = get_faq_index()
+    if index is None:
+        return None
+
+    try:
+        return await run_in_worker(index.lookup, message, embedding)
+    except Exception as e:
+        print(f"⚠️ FAQ index unavailable: {e}")
+        return None
+
+
+def _cache_answer(message: str, result: dict, embedding, generation: int):
+    """Store a successful agent result computed at data `generation` in the semantic answer cache."""
+    from rag.semantic_cache import get_answer_cache, is_cacheable
+    cache = get_answer_cache()
+    if cache is not None and embedding is not None and is_cacheable(result):
+        cache.store(message, result, embedding, generation)
+
+
+async def _load_history(conversation_id: Optional[str]) -> str:
+    """Conversation context for the agent ("" for a new or anonymous chat)."""
+    if not conversation_id:
+        return ""
+    try:
+        from data.conversations import get_conversation_store
+        return await run_in_worker(get_conversation_store().get_history, conversation_id)
+    except Exception as e:
+        print(f"⚠️ Conversation memory unavailable: {e}")
+        return ""
+
+
+_background_tasks = set()
+
+
+def _remember(conversation_id: Optional[str], message: str, result: dict):
+    """Record the exchange without delaying the response (summarizing may call the LLM)."""
+    if not conversation_id:
+        return
+
+    async def _write():
+        try:
+            from data.conversations import get_conversation_store
+            await run_in_worker(get_conversation_store().append_turn, conversation_id, message, result["answer"])
+        except Exception as e:
+            print(f"⚠️ Failed to save conversation turn: {e}")
+
+    task = asyncio.create_task(_write())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+# Identical context-free messages in flight at the same time share one answer
+chat_flights = SingleFlight()
+
+
+async def _answer(message: str, history: str = "") -> dict:
+    """Answer a message: semantic cache, FAQ index, fast-path router, then the agent."""
+    from agents.router import try_route, router_stats
+    result, embedding = None, None
+    # Read before answering, so an answer built from pre-write data is not cached
+    generation = get_data_generation()
+
+    # Follow-ups depend on earlier turns, so only context-free messages
+    # may be answered from the cache or the fast path
+    if not history:
+        cached, embedding = await _lookup_cached_answer(message)
+        if cached is not None:
+            CHAT_ANSWERS.inc(path="cache")
+            return cached
+
+        # Curated FAQ answers need no LLM call at all
+        faq = await _lookup_faq_answer(message, embedding)
+        if faq is not None:
+            CHAT_ANSWERS.inc(path="faq")
+            return faq
+
+        # Simple structured questions skip the ReAct loop
+        result = await try_route(message, embedding)
+        if result is not None:
+            CHAT_ANSWERS.inc(path="router")
+
+    if result is None:
+        from agents.klu_agent import arun_agent
+        agent_start = time.perf_counter()
+        result = await arun_agent(message, history)
+        router_stats.record_agent(time.perf_counter() - agent_start)
+        CHAT_ANSWERS.inc(path="agent")
+
+    _cache_answer(message, result, embedding, generation)
+    return result
+
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest):
+    """
+    Main chat endpoint. Sends user message to the KLU Agent
+    and returns a grounded response.
+    """
+    start_time = time.time()
+
+    # Validate API key is configured
+    _check_llm_configured()
+    await _wait_until_ready()
+
+    try:
+        history = await _load_history(request.conversation_id)
+        if history:
+            result = await _answer(request.message, history)
+        else:
+            from rag.embeddings import _normalize_text
+            result = await chat_flights.do(
+                _normalize_text(request.message),
+                lambda: _answer(request.message)
+            )
+
+        _remember(request.conversation_id, request.message, result)
 
         response_time = round(time.time() - start_time, 2)
 
@@ -209,9 +547,92 @@ async def chat(request: ChatRequest):
         )
 
 
-@app.get("/api/events")
-async def get_events():
-    """Get all upcoming events."""
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming chat endpoint (Server-Sent Events).
+    Emits tool progress while the agent works, then the final answer
+    token by token, and finally a 'done' event with sources and timing.
+    """
+    start_time = time.time()
+
+    # Validate API key is configured
+    _check_llm_configured()
+    await _wait_until_ready()
+
+    async def event_stream():
+        # Flush something immediately so the client sees the first byte at once
+        yield _sse("start", {"message": request.message})
+
+        try:
+            from agents.router import try_route, router_stats
+            history = await _load_history(request.conversation_id)
+            result, embedding = None, None
+            generation = get_data_generation()
+            streamed_tokens = False
+
+            if not history:
+                cached, embedding = await _lookup_cached_answer(request.message)
+                if cached is not None:
+                    CHAT_ANSWERS.inc(path="cache")
+                    _remember(request.conversation_id, request.message, cached)
+                    yield _sse("token", {"text": cached["answer"]})
+                    yield _sse("done", {**cached, "response_time": round(time.time() - start_time, 2)})
+                    return
+
+                faq = await _lookup_faq_answer(request.message, embedding)
+                if faq is not None:
+                    CHAT_ANSWERS.inc(path="faq")
+                    _remember(request.conversation_id, request.message, faq)
+                    yield _sse("token", {"text": faq["answer"]})
+                    yield _sse("done", {**faq, "response_time": round(time.time() - start_time, 2)})
+                    return
+
+                result = await try_route(request.message, embedding)
+                if result is not None:
+                    CHAT_ANSWERS.inc(path="router")
+
+            if result is None:
+                from agents.klu_agent import astream_agent
+                agent_start = time.perf_counter()
+                async for event, data in astream_agent(request.message, history):
+                    if event == "result":
+                        result = data
+                        continue
+                    streamed_tokens = streamed_tokens or event == "token"
+                    yield _sse(event, data)
+                router_stats.record_agent(time.perf_counter() - agent_start)
+                CHAT_ANSWERS.inc(path="agent")
+
+            if result is None:
+                raise RuntimeError("Agent finished without a result")
+
+            if not streamed_tokens:
+                # The model did not stream - send the answer in one piece
+                yield _sse("token", {"text": result["answer"]})
+
+            _cache_answer(request.message, result, embedding, generation)
+            _remember(request.conversation_id, request.message, result)
+            yield _sse("done", {**result, "response_time": round(time.time() - start_time, 2)})
+
+        except Exception as e:
+            print(f"❌ Chat stream error: {e}")
+            yield _sse("error", {"detail": f"An error occurred while processing your request: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _load_upcoming_events() -> list:
+    """Fetch all upcoming events from the database."""
     session = SessionLocal()
     try:
         events = session.query(Event).filter(Event.is_upcoming == True).all()
@@ -227,9 +648,8 @@ async def get_events():
         session.close()
 
 
-@app.get("/api/faqs")
-async def get_faqs(category: Optional[str] = None):
-    """Get FAQs, optionally filtered by category."""
+def _load_faqs(category: Optional[str] = None) -> list:
+    """Fetch FAQs from the database, optionally filtered by category."""
     session = SessionLocal()
     try:
         query = session.query(FAQ)
@@ -246,15 +666,43 @@ async def get_faqs(category: Optional[str] = None):
         session.close()
 
 
+@app.get("/api/events")
+async def get_events():
+    """Get all upcoming events."""
+    return await run_in_worker(_load_upcoming_events)
+
+
+@app.get("/api/faqs")
+async def get_faqs(category: Optional[str] = None):
+    """Get FAQs, optionally filtered by category."""
+    return await run_in_worker(_load_faqs, category)
+
+
 @app.post("/api/rebuild-index")
-async def rebuild_index():
-    """Rebuild the vector store index from scratch."""
+async def rebuild_index(full: bool = False):
+    """
+    Re-sync the vector store index with the knowledge base and PDFs.
+    Only new or changed content is re-embedded; pass ?full=true to
+    rebuild the index from scratch.
+    """
     try:
-        from rag.vector_store import initialize_vector_store
-        store = initialize_vector_store()
+        from rag import vector_store
+        store = await run_in_worker(vector_store.initialize_vector_store, full)
+
+        # Cached answers may be grounded in the old index (or an old embedding
+        # model), so every rebuild invalidates them - even one with no chunk changes
+        stats = vector_store.last_index_stats
+        from rag.semantic_cache import get_answer_cache
+        cache = get_answer_cache()
+        if cache is not None:
+            cache.clear()
+
         if store:
-            count = store._collection.count()
-            return {"status": "success", "documents_indexed": count}
+            return {
+                "status": "success",
+                "documents_indexed": stats.get("total_chunks", 0),
+                "changes": stats
+            }
         return {"status": "failed", "message": "Could not initialize vector store"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,161 @@
+"""
+KLU Agent - Metrics Module
+Minimal in-process Prometheus-style metrics (counters and histograms with
+labels) rendered in the text exposition format at /metrics. Recording is
+a dict lookup and a few additions under a lock, cheap enough for the hot
+path.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _snapshot_key(names, values) -> str:
+    return ",".join(f"{name}={value}" for name, value in zip(names, values))
+
+
+def _format_value(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0)
+
+    def snapshot(self) -> dict:
+        """Value per label set, keyed "name=value,..." (used by benchmarks)."""
+        with self._lock:
+            return {_snapshot_key(self.labelnames, key): value for key, value in self._values.items()}
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """Count and sum per label set, keyed "name=value,..." (used by benchmarks)."""
+        with self._lock:
+            return {
+                _snapshot_key(self.labelnames, key): {"count": series[-1], "sum": series[-2]}
+                for key, series in self._series.items()
+            }
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+def render_metrics() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ============================================
+# Application Metrics
+# ============================================
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "klu_http_request_duration_seconds", "HTTP request latency (until response start)",
+    ("method", "path", "status"))
+EMBEDDING_SECONDS = Histogram(
+    "klu_embedding_seconds", "Embedding model call latency", ("kind",))
+EMBEDDING_BATCH_QUERIES = Histogram(
+    "klu_embedding_batch_size", "Queries per micro-batched embedding pass", (),
+    buckets=(1, 2, 4, 8, 16, 32, 64))
+VECTOR_SEARCH_SECONDS = Histogram(
+    "klu_vector_search_seconds", "Retriever latency", ("retriever",))
+TOOL_SECONDS = Histogram(
+    "klu_tool_seconds", "Agent tool latency", ("tool",))
+LLM_SECONDS = Histogram(
+    "klu_llm_seconds", "LLM call latency", ("model",))
+LLM_TOKENS = Counter(
+    "klu_llm_tokens_total", "LLM tokens used", ("model", "kind"))
+AGENT_ITERATIONS = Histogram(
+    "klu_agent_iterations", "LLM steps per agent run", (), buckets=(1, 2, 3, 4, 5, 6, 8, 10))
+AGENT_RUNS = Counter(
+    "klu_agent_runs_total", "Agent runs by outcome (ok / fallback)", ("outcome",))
+CHAT_ANSWERS = Counter(
+    "klu_chat_answers_total", "Chat answers by path (cache / faq / router / agent)", ("path",))
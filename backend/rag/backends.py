@@ -0,0 +1,76 @@
+"""
+KLU Agent - Vector Backend Module
+Opens the configured vector store backend (VECTOR_BACKEND) and provides the
+few bulk operations indexing needs, so the rest of the RAG code does not
+depend on Chroma internals.
+"""
+
+from pathlib import Path
+from rag.embeddings import get_embedding_model
+import config
+
+
+def is_numpy_backend() -> bool:
+    return config.VECTOR_BACKEND == "numpy"
+
+
+def index_dir() -> Path:
+    """Directory holding the backend's data (and the manifest / BM25 index)."""
+    return Path(config.NUMPY_INDEX_DIR if is_numpy_backend() else config.CHROMA_PERSIST_DIR)
+
+
+def open_store():
+    """Open (or create) the persisted vector store for the configured backend."""
+    if is_numpy_backend():
+        from rag.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(persist_directory=str(index_dir()), embedding_function=get_embedding_model())
+
+    from langchain_community.vectorstores import Chroma
+    return Chroma(
+        persist_directory=config.CHROMA_PERSIST_DIR,
+        embedding_function=get_embedding_model(),
+        collection_name=config.CHROMA_COLLECTION_NAME
+    )
+
+
+def count_chunks(store) -> int:
+    if is_numpy_backend():
+        return store.count()
+    return store._collection.count()
+
+
+def upsert_chunks(store, ids, embeddings, documents, metadatas):
+    """Write chunks with precomputed embeddings in one bulk call."""
+    if is_numpy_backend():
+        store.upsert(ids, embeddings, documents, metadatas)
+    else:
+        store._collection.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
+
+
+def delete_chunks(store, ids):
+    if is_numpy_backend():
+        store.delete(ids)
+    else:
+        store._collection.delete(ids=ids)
+
+
+def get_all_chunks(store) -> dict:
+    """All stored chunks as {"ids", "documents", "metadatas"}."""
+    if is_numpy_backend():
+        return store.get_all()
+    return store._collection.get(include=["documents", "metadatas"])
+
+
+def reset_store(store):
+    """Drop every chunk and return a fresh, empty store."""
+    if is_numpy_backend():
+        store.reset()
+        return store
+    store.delete_collection()
+    return open_store()
+
+
+def persist_store(store):
+    """Flush pending writes (Chroma persists on every write)."""
+    if is_numpy_backend():
+        store.persist()
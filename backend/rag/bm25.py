@@ -0,0 +1,111 @@
+"""
+KLU Agent - BM25 Keyword Index Module
+Small in-memory Okapi BM25 index over the same chunks stored in the vector
+store. It catches exact tokens the dense model blurs ("KLUEEE",
+"BCSE-AIML", fee figures). Persisted next to the Chroma collection.
+"""
+
+import math
+import os
+import pickle
+import re
+from collections import Counter, defaultdict
+from langchain_core.documents import Document
+
+
+BM25_INDEX_VERSION = 1
+
+
+def tokenize(text: str) -> list:
+    """Lowercased word/number tokens ("BCSE-AIML" -> ["bcse", "aiml"])."""
+    return re.findall(r"\w+", text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks, with an inverted index for scoring."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.texts = []
+        self.metadatas = []
+        self._postings = {}     # token -> list of (doc index, term frequency)
+        self._idf = {}
+        self._doc_len = []
+        self._avg_len = 0.0
+
+    @classmethod
+    def build(cls, ids, texts, metadatas):
+        index = cls()
+        index.ids = list(ids)
+        index.texts = list(texts)
+        index.metadatas = [m or {} for m in metadatas]
+
+        postings = defaultdict(list)
+        for doc_index, text in enumerate(index.texts):
+            counts = Counter(tokenize(text))
+            index._doc_len.append(sum(counts.values()))
+            for token, tf in counts.items():
+                postings[token].append((doc_index, tf))
+
+        n_docs = len(index.texts)
+        index._postings = dict(postings)
+        index._avg_len = (sum(index._doc_len) / n_docs) if n_docs else 0.0
+        index._idf = {
+            token: math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for token, plist in index._postings.items()
+        }
+        return index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, query: str, k: int, allowed=None):
+        """
+        Score chunks against the query.
+
+        Args:
+            allowed: optional predicate on chunk metadata to restrict the search
+
+        Returns:
+            list of (doc index, score), best first
+        """
+        scores = defaultdict(float)
+        for token in set(tokenize(query)):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for doc_index, tf in self._postings[token]:
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_index] / self._avg_len)
+                scores[doc_index] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if allowed is not None:
+            ranked = [item for item in ranked if allowed(self.metadatas[item[0]])]
+        return ranked[:k]
+
+    def get_documents(self, query: str, k: int, allowed=None):
+        """Search and return LangChain Documents (with chunk IDs)."""
+        return [
+            Document(id=self.ids[i], page_content=self.texts[i], metadata=dict(self.metadatas[i]))
+            for i, _ in self.search(query, k, allowed)
+        ]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"version": BM25_INDEX_VERSION, "index": self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Load a persisted index, or None if missing or from another version."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+        if payload.get("version") != BM25_INDEX_VERSION:
+            return None
+        return payload["index"]
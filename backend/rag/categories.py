@@ -0,0 +1,67 @@
+"""
+KLU Agent - Knowledge Base Categories Module
+Canonical chunk categories, the aliases used by flattened knowledge-base
+keys, and a keyword-based guess of which category a question is about
+(used to restrict retrieval to one partition of the index).
+"""
+
+import re
+from typing import Optional
+
+
+# Flattened JSON uses the top-level key as category; map it onto the
+# categories used by the structured documents.
+CATEGORY_ALIASES = {
+    "university_overview": "overview",
+    "fee_structure": "fees",
+    "campus_facilities": "campus",
+    "academic_calendar": "schedule",
+    "student_clubs": "clubs",
+    "events_and_fests": "events",
+    "contact_information": "contact",
+}
+
+CATEGORIES = ["overview", "admissions", "departments", "placements", "campus",
+              "fees", "schedule", "clubs", "events", "contact"]
+
+# Chunks that belong to no single category (PDF pages, unmapped flattened
+# keys); category-restricted searches always include them
+GENERAL_CATEGORY = "general"
+
+# (category, pattern) - checked case-insensitively
+CATEGORY_KEYWORDS = [
+    ("fees", r"\bfees?\b|tuition|\bcost\b|scholarships?|\bpayment\b|how much"),
+    ("admissions", r"admissions?|eligibility|entrance|\bapply\b|application|\beamcet\b|\bjee\b|kluee+"),
+    ("placements", r"placements?|recruiters?|\bpackage\b|\blpa\b|internships?|\bjobs?\b"),
+    ("departments", r"departments?|\bhod\b|laborator(y|ies)|specializations?"),
+    ("campus", r"library|sports|\bgym\b|transport|\bbus\b|canteen|medical|auditorium|facilit(y|ies)"),
+    ("schedule", r"calendar|semester|\bexams?\b|convocation|\bbreak\b|holidays?"),
+    ("clubs", r"\bclubs?\b"),
+    ("events", r"\bfests?\b|samyak|surabhi|\bevents?\b"),
+    ("contact", r"contact|\bemail\b|phone|address|helpline"),
+    ("overview", r"ranking|accreditation|\bnaac\b|\bnirf\b|established|campus area"),
+]
+
+
+def canonical_category(category: Optional[str]) -> Optional[str]:
+    """Map a raw or aliased category name to its canonical form (or None)."""
+    if not category:
+        return None
+    key = category.strip().lower().replace(" ", "_")
+    key = CATEGORY_ALIASES.get(key, key)
+    return key if key in CATEGORIES else None
+
+
+def category_values(category: str) -> list:
+    """Chunk categories a search restricted to `category` may return."""
+    return [category, GENERAL_CATEGORY]
+
+
+def infer_category(query: str) -> Optional[str]:
+    """
+    Guess the single category a question is about.
+    Returns None when no category, or more than one, matches.
+    """
+    matched = [category for category, pattern in CATEGORY_KEYWORDS
+               if re.search(pattern, query, re.IGNORECASE)]
+    return matched[0] if len(matched) == 1 else None
@@ -4,8 +4,11 @@ Builds the LangChain RAG chain for context-grounded responses.
 """
 
 from langchain.prompts import ChatPromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
+from langchain.schema.runnable import RunnableLambda, RunnablePassthrough
 from langchain.schema.output_parser import StrOutputParser
+from rag.context import assemble_context, count_tokens
+from rag.dedup import drop_redundant
+import threading
 import config
 
 
@@ -40,8 +43,21 @@ RAG_USER_PROMPT = """Student/User Question: {question}
 Please provide a helpful, accurate response based on the context above. If the context doesn't contain enough information, say so clearly."""
 
 
-def get_llm():
-    """Get the configured LLM."""
+_llm_cache = {}
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_config_key() -> tuple:
+    """Identify the current LLM configuration; a new key means a new client."""
+    if config.LLM_PROVIDER == "gemini":
+        return ("gemini", config.GEMINI_MODEL, config.TEMPERATURE, config.GOOGLE_API_KEY)
+    if config.LLM_PROVIDER == "openai":
+        return ("openai", config.OPENAI_MODEL, config.TEMPERATURE, config.OPENAI_API_KEY)
+    return (config.LLM_PROVIDER,)
+
+
+def _create_llm():
+    """Build a new client for the configured LLM."""
     if config.LLM_PROVIDER == "gemini":
         from langchain_google_genai import ChatGoogleGenerativeAI
         return ChatGoogleGenerativeAI(
@@ -61,6 +77,26 @@ def get_llm():
         raise ValueError(f"Unsupported LLM provider: {config.LLM_PROVIDER}")
 
 
+def get_llm():
+    """
+    Get the configured LLM (process-wide, one client per configuration).
+    Reusing the client keeps its HTTP connection pool warm across requests.
+    """
+    key = get_llm_config_key()
+    llm = _llm_cache.get(key)
+
+    if llm is None:
+        with _llm_cache_lock:
+            llm = _llm_cache.get(key)
+            if llm is None:
+                llm = _create_llm()
+                # Only the active configuration is kept alive
+                _llm_cache.clear()
+                _llm_cache[key] = llm
+
+    return llm
+
+
 def build_rag_chain(retriever):
     """
     Build a RAG chain that retrieves relevant context and generates a grounded response.
@@ -72,16 +108,23 @@ def build_rag_chain(retriever):
         ("human", RAG_USER_PROMPT)
     ])
 
-    def format_docs(docs):
+    def format_docs(docs, question):
+        docs, _ = drop_redundant(docs, config.REDUNDANCY_THRESHOLD)
+        docs = assemble_context(docs, question, label="RAG context")
         return "\n\n---\n\n".join(doc.page_content for doc in docs)
 
+    def log_prompt_tokens(prompt_value):
+        print(f"📏 RAG prompt: {count_tokens(prompt_value.to_string())} tokens")
+        return prompt_value
+
     rag_chain = (
         {
-            "context": retriever | format_docs,
+            "context": lambda x: format_docs(retriever.invoke(x["question"]), x["question"]),
             "db_context": lambda x: x.get("db_context", "No database results."),
             "question": lambda x: x["question"]
         }
         | prompt
+        | RunnableLambda(log_prompt_tokens)
         | llm
         | StrOutputParser()
     )
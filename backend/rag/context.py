@@ -0,0 +1,126 @@
+"""
+KLU Agent - Context Assembly Module
+Packs retrieved chunks into the prompt under a token budget: chunks are
+taken in rank order, and a chunk that does not fit whole is compressed to
+its sentences most similar to the question. Token counts use tiktoken for
+OpenAI models when available, and a characters/4 estimate otherwise.
+"""
+
+import re
+import threading
+from typing import List
+import numpy as np
+from langchain_core.documents import Document
+import config
+
+
+_encoder = None
+_encoder_key = None
+_encoder_lock = threading.Lock()
+
+# Below this many free tokens a trimmed chunk is not worth including
+MIN_TRIMMED_TOKENS = 32
+
+
+def _get_encoder():
+    """tiktoken encoder for the configured OpenAI model, or None."""
+    global _encoder, _encoder_key
+
+    if config.LLM_PROVIDER != "openai":
+        return None
+
+    if _encoder_key != config.OPENAI_MODEL:
+        with _encoder_lock:
+            if _encoder_key != config.OPENAI_MODEL:
+                try:
+                    import tiktoken
+                    try:
+                        _encoder = tiktoken.encoding_for_model(config.OPENAI_MODEL)
+                    except KeyError:
+                        _encoder = tiktoken.get_encoding("cl100k_base")
+                except ImportError:
+                    _encoder = None
+                _encoder_key = config.OPENAI_MODEL
+
+    return _encoder
+
+
+def count_tokens(text: str) -> int:
+    """Token count for the configured LLM provider."""
+    encoder = _get_encoder()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    # Gemini (and fallback): ~4 characters per token for English text
+    return (len(text) + 3) // 4
+
+
+def _split_sentences(text: str) -> List[str]:
+    # Knowledge-base chunks are line-oriented ("Fee: ...\nHostel: ..."), PDFs are prose
+    parts = re.split(r"(?<=[.!?])\s+|\n+", text)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def compress_chunk(text: str, query: str, budget: int) -> str:
+    """
+    Keep the sentences most similar to the query that fit in `budget` tokens,
+    in their original order.
+    """
+    sentences = _split_sentences(text)
+    if len(sentences) <= 1:
+        return ""
+
+    from rag.embeddings import get_embedding_model
+    model = get_embedding_model()
+    query_vector = np.asarray(model.embed_query(query), dtype=np.float32)
+    sentence_vectors = np.asarray(model.embed_documents(sentences), dtype=np.float32)
+    ranked = np.argsort(-(sentence_vectors @ query_vector))
+
+    chosen, used = [], 0
+    for index in ranked:
+        cost = count_tokens(sentences[index]) + 1
+        if used + cost > budget:
+            continue
+        chosen.append(int(index))
+        used += cost
+
+    return "\n".join(sentences[i] for i in sorted(chosen))
+
+
+def assemble_context(docs, query: str, budget: int = None, label: str = "context") -> List[Document]:
+    """
+    Select and, where needed, compress ranked chunks to fit a token budget.
+
+    Args:
+        docs: retrieved documents, best first
+        budget: max context tokens (defaults to CONTEXT_TOKEN_BUDGET)
+
+    Returns:
+        documents to put in the prompt (trimmed ones are copies)
+    """
+    budget = budget or config.CONTEXT_TOKEN_BUDGET
+    selected, used, trimmed, dropped = [], 0, 0, 0
+    compressed = False
+
+    for position, doc in enumerate(docs):
+        remaining = budget - used
+        cost = count_tokens(doc.page_content)
+        if cost <= remaining:
+            selected.append(doc)
+            used += cost
+            continue
+
+        # Compression embeds every sentence on the request path: only the
+        # first chunk that doesn't fit gets it, and packing stops once it is in
+        if not compressed and remaining >= MIN_TRIMMED_TOKENS:
+            compressed = True
+            content = compress_chunk(doc.page_content, query, remaining)
+            if content:
+                selected.append(Document(page_content=content, metadata={**doc.metadata, "trimmed": True}))
+                used += count_tokens(content)
+                trimmed += 1
+                dropped += len(docs) - position - 1
+                break
+        dropped += 1
+
+    print(f"📏 {label}: {len(selected)} chunks, {used}/{budget} tokens ({trimmed} trimmed, {dropped} dropped)")
+    return selected
@@ -0,0 +1,124 @@
+"""
+KLU Agent - Deduplication Module
+Ingest-time chunk deduplication (exact hash + MinHash/LSH near-duplicate
+detection) and a retrieval-time redundancy filter that drops chunks whose
+content is already covered by a higher-ranked chunk.
+"""
+
+import hashlib
+import re
+import zlib
+from collections import defaultdict
+from typing import Optional
+import numpy as np
+from rag.context import count_tokens
+
+
+_PRIME = (1 << 31) - 1  # keeps a * x + b inside uint64
+
+
+def _tokens(text: str) -> list:
+    return re.findall(r"\w+", text.casefold())
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    tokens = _tokens(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures over word 3-gram shingles."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        shingles = _shingles(text)
+        if not shingles:
+            return None
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self._a) + self._b) % _PRIME).min(axis=0)
+
+
+class ChunkDeduplicator:
+    """
+    Remembers the chunks accepted so far and flags new chunks that are exact
+    (normalized text) or near duplicates (estimated Jaccard >= threshold).
+    Near-duplicate candidates are found with LSH banding, so each check is
+    roughly constant time instead of a scan over all previous chunks.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.tokens_skipped = 0
+        self._exact = set()
+        self._signatures = []
+        self._buckets = defaultdict(list)
+
+    def check(self, text: str) -> Optional[str]:
+        """Return "exact" / "near" for a duplicate, or None after accepting the chunk."""
+        normalized = re.sub(r"\s+", " ", text).strip().casefold()
+        key = hashlib.sha1(normalized.encode("utf-8")).digest()
+        if key in self._exact:
+            self.exact_duplicates += 1
+            self.tokens_skipped += count_tokens(text)
+            return "exact"
+
+        signature = self.hasher.signature(text)
+        if signature is not None:
+            band_keys = [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                         for band in range(self.bands)]
+            candidates = {index for band_key in band_keys for index in self._buckets.get(band_key, ())}
+            for index in candidates:
+                if np.mean(signature == self._signatures[index]) >= self.threshold:
+                    self.near_duplicates += 1
+                    self.tokens_skipped += count_tokens(text)
+                    return "near"
+
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            for band_key in band_keys:
+                self._buckets[band_key].append(index)
+
+        self._exact.add(key)
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "duplicates_exact": self.exact_duplicates,
+            "duplicates_near": self.near_duplicates,
+            "duplicate_tokens_skipped": self.tokens_skipped,
+        }
+
+
+def drop_redundant(docs, threshold: float):
+    """
+    Drop retrieved chunks whose tokens are mostly (>= threshold) contained in
+    a higher-ranked chunk that is already kept.
+
+    Returns:
+        (kept documents, estimated prompt tokens saved)
+    """
+    kept, kept_tokens, saved = [], [], 0
+    for doc in docs:
+        tokens = set(_tokens(doc.page_content))
+        if tokens and any(len(tokens & other) / len(tokens) >= threshold for other in kept_tokens):
+            saved += count_tokens(doc.page_content)
+            continue
+        kept.append(doc)
+        kept_tokens.append(tokens)
+
+    if saved:
+        print(f"🧹 Dropped {len(docs) - len(kept)} redundant chunks (~{saved} prompt tokens saved)")
+    return kept, saved
@@ -1,29 +1,290 @@
 """
 KLU Agent - Embedding Module
 Handles text embedding using HuggingFace sentence-transformers.
+Query embeddings are memoized in a memory-bounded LRU cache that can
+optionally be persisted to disk across restarts; cache misses from
+concurrent requests are micro-batched into one forward pass.
 """
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from metrics import EMBEDDING_BATCH_QUERIES, EMBEDDING_SECONDS
 import config
 
 
 _embedding_model = None
+_embedding_model_lock = threading.Lock()
+
+# Approximate per-entry bookkeeping cost (OrderedDict slot + ndarray header)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def _normalize_text(text: str) -> str:
+    """Normalize query text for cache keys (all-MiniLM-L6-v2 is uncased)."""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class MicroBatchedEmbeddings(Embeddings):
+    """
+    Coalesces concurrent embed_query calls into batched forward passes.
+
+    Callers enqueue their text and block on a future; one background thread
+    takes the first waiting request, collects more for up to max_wait
+    seconds or until max_batch have arrived, embeds them with a single
+    embed_documents call and resolves every future. Requests that queue up
+    while a batch is running are picked up together by the next one.
+    Document embeddings (bulk ingestion, already batched) pass straight
+    through.
+    """
+
+    def __init__(self, base: Embeddings, max_batch: int, max_wait: float):
+        self.base = base
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+                    self._thread.start()
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Past the deadline, still take whatever is already queued
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                vectors = self.base.embed_documents([text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            EMBEDDING_BATCH_QUERIES.observe(len(batch))
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        self._ensure_thread()
+        future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "queries": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Exact-match query-embedding cache around another Embeddings model.
+
+    Keys are normalized query text; values are float32 vectors. The cache is
+    bounded by total bytes and evicts least-recently-used entries. Document
+    embeddings (bulk ingestion) pass straight through to the wrapped model.
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, max_bytes: int, persist_path: str = ""):
+        self.base = base
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.persist_path = persist_path
+        self.hits = 0
+        self.misses = 0
+        self._miss_seconds = 0.0
+        self._bytes = 0
+        self._entries = OrderedDict()  # normalized text -> np.ndarray
+        self._lock = threading.Lock()
+
+        if persist_path:
+            self.load()
+
+    @staticmethod
+    def _entry_size(key: str, vector: np.ndarray) -> int:
+        return sys.getsizeof(key) + vector.nbytes + _ENTRY_OVERHEAD_BYTES
+
+    def _put(self, key: str, vector: np.ndarray):
+        if key in self._entries:
+            self._bytes -= self._entry_size(key, self._entries.pop(key))
+        self._entries[key] = vector
+        self._bytes += self._entry_size(key, vector)
+        while self._bytes > self.max_bytes and self._entries:
+            old_key, old_vector = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(old_key, old_vector)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = _normalize_text(text)
+
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector.tolist()
+
+        start = time.perf_counter()
+        vector = np.asarray(self.base.embed_query(key), dtype=np.float32)
+        elapsed = time.perf_counter() - start
+        EMBEDDING_SECONDS.observe(elapsed, kind="query")
+
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += elapsed
+            self._put(key, vector)
+
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with EMBEDDING_SECONDS.time(kind="documents"):
+            return self.base.embed_documents(texts)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "time_saved_seconds": round(self.hits * avg_miss, 3),
+            "entries": len(self._entries),
+            "memory_mb": round(self._bytes / (1024 * 1024), 2),
+            **({"batching": self.base.stats()} if isinstance(self.base, MicroBatchedEmbeddings) else {}),
+        }
+
+    def save(self):
+        """Persist the cache to disk (no-op if persistence is disabled)."""
+        if not self.persist_path:
+            return
+
+        with self._lock:
+            keys = list(self._entries.keys())
+            vectors = np.stack(list(self._entries.values())) if keys else np.zeros((0, 0), dtype=np.float32)
+
+        os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+        tmp_path = f"{self.persist_path}.tmp.npz"
+        np.savez(tmp_path, keys=np.array(keys, dtype=str), vectors=vectors, model=np.array(self.model_name))
+        os.replace(tmp_path, self.persist_path)
+        print(f"💾 Saved {len(keys)} cached query embeddings to {self.persist_path}")
+
+    def load(self):
+        """Load a previously persisted cache built with the same model."""
+        if not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with np.load(self.persist_path, allow_pickle=False) as data:
+                if str(data["model"]) != self.model_name:
+                    print("⚠️ Embedding cache was built with a different model, ignoring it")
+                    return
+                with self._lock:
+                    for key, vector in zip(data["keys"], data["vectors"]):
+                        self._put(str(key), vector.astype(np.float32))
+            print(f"✅ Loaded {len(self._entries)} cached query embeddings")
+        except Exception as e:
+            print(f"⚠️ Failed to load embedding cache: {e}")
+
+
+def create_base_embeddings():
+    """
+    Build the configured embedding model (EMBEDDING_BACKEND).
+
+    Returns:
+        (Embeddings, identifier of the vectors it produces) - the identifier
+        keys the query cache and the index manifest, so vectors from
+        different backends are never mixed.
+    """
+    if config.EMBEDDING_BACKEND == "onnx":
+        try:
+            from rag.onnx_embeddings import load_onnx_embeddings
+            return load_onnx_embeddings(), f"{config.EMBEDDING_MODEL}+onnx-int8"
+        except ImportError as e:
+            print(f"⚠️ ONNX Runtime not available ({e}), using the PyTorch embedding model")
+        except Exception as e:
+            print(f"⚠️ ONNX embedding model failed to load ({e}), using the PyTorch embedding model")
+
+    # Deferred: langchain_community and sentence-transformers are
+    # slow to import and only needed once the model is loaded
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from rag.snapshot import model_snapshot_path
+
+    snapshot = model_snapshot_path()
+    if snapshot:
+        print(f"📦 Using embedding model snapshot: {snapshot}")
+    base = HuggingFaceEmbeddings(
+        model_name=snapshot or config.EMBEDDING_MODEL,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True, "batch_size": config.EMBEDDING_BATCH_SIZE}
+    )
+    return base, config.EMBEDDING_MODEL
 
 
 def get_embedding_model():
     """
     Get or create the embedding model (singleton pattern).
-    Uses HuggingFace sentence-transformers for generating embeddings.
+    Uses HuggingFace sentence-transformers (PyTorch or quantized ONNX) for
+    generating embeddings, wrapped in a query-embedding cache.
     """
     global _embedding_model
 
     if _embedding_model is None:
-        print(f"🔄 Loading embedding model: {config.EMBEDDING_MODEL}...")
-        _embedding_model = HuggingFaceEmbeddings(
-            model_name=config.EMBEDDING_MODEL,
-            model_kwargs={"device": "cpu"},
-            encode_kwargs={"normalize_embeddings": True}
-        )
-        print(f"✅ Embedding model loaded: {config.EMBEDDING_MODEL}")
+        with _embedding_model_lock:
+            if _embedding_model is None:
+                print(f"🔄 Loading embedding model: {config.EMBEDDING_MODEL} ({config.EMBEDDING_BACKEND})...")
+                base, model_name = create_base_embeddings()
+                if config.EMBEDDING_BATCHING_ENABLED:
+                    base = MicroBatchedEmbeddings(
+                        base,
+                        max_batch=config.EMBEDDING_BATCH_MAX_SIZE,
+                        max_wait=config.EMBEDDING_BATCH_MAX_WAIT_MS / 1000
+                    )
+                _embedding_model = CachedEmbeddings(
+                    base=base,
+                    model_name=model_name,
+                    max_bytes=config.EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+                    persist_path=config.EMBEDDING_CACHE_PATH
+                )
+                print(f"✅ Embedding model loaded: {model_name}")
 
     return _embedding_model
+
+
+def save_embedding_cache():
+    """Persist the query-embedding cache if the model has been loaded."""
+    if _embedding_model is not None:
+        try:
+            _embedding_model.save()
+        except Exception as e:
+            print(f"⚠️ Failed to save embedding cache: {e}")
@@ -0,0 +1,110 @@
+"""
+KLU Agent - FAQ Answer Index Module
+Embeds the curated FAQ questions (FAQ table) into a small in-memory matrix
+so a chat message that closely matches one is answered with the curated
+answer directly - one dot product, no LLM call. The index is rebuilt when
+the FAQ rows change.
+"""
+
+import threading
+from typing import Optional
+import numpy as np
+from rag.embeddings import get_embedding_model
+from data.database import SessionLocal, FAQ, get_data_generation
+import config
+
+
+class FAQIndex:
+    """
+    Cosine-similarity lookup over the FAQ questions.
+
+    Embeddings are L2-normalized, so similarity is a dot product against
+    the stacked question vectors.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._index = (None, [])   # (question matrix, [(question, answer)] per row), swapped as one
+        self._signature = None   # FAQ rows the matrix was built from
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Re-embed the FAQs if the database changed since the last build."""
+        generation = get_data_generation()
+        if generation == self._generation:
+            return
+
+        with self._lock:
+            if generation == self._generation:
+                return
+
+            session = SessionLocal()
+            try:
+                faqs = [(f.id, f.question, f.answer) for f in session.query(FAQ).order_by(FAQ.id)]
+            finally:
+                session.close()
+
+            # Any write bumps the generation; only re-embed when the FAQs themselves changed
+            if faqs != self._signature:
+                matrix = None
+                if faqs:
+                    vectors = get_embedding_model().embed_documents([question for _, question, _ in faqs])
+                    matrix = np.asarray(vectors, dtype=np.float32)
+                self._index = (matrix, [(question, answer) for _, question, answer in faqs])
+                self._signature = faqs
+                print(f"📚 FAQ answer index built ({len(faqs)} questions)")
+            self._generation = generation
+
+    def lookup(self, query: str, embedding: np.ndarray = None) -> Optional[dict]:
+        """The curated answer for a closely matching FAQ question, or None."""
+        self.refresh()
+        matrix, faqs = self._index
+        if matrix is None:
+            return None
+
+        if embedding is None:
+            embedding = np.asarray(get_embedding_model().embed_query(query.strip()), dtype=np.float32)
+
+        scores = matrix @ embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            "answer": faqs[best][1],
+            "sources": ["KLU FAQs"],
+            "tools_used": ["FAQIndex"],
+        }
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "questions": len(self._index[1]),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+_faq_index = None
+_faq_index_lock = threading.Lock()
+
+
+def get_faq_index():
+    """Get the shared FAQ answer index, or None if disabled."""
+    global _faq_index
+
+    if not config.FAQ_INDEX_ENABLED:
+        return None
+
+    if _faq_index is None:
+        with _faq_index_lock:
+            if _faq_index is None:
+                _faq_index = FAQIndex(threshold=config.FAQ_MATCH_THRESHOLD)
+
+    return _faq_index
@@ -0,0 +1,188 @@
+"""
+KLU Agent - Ingestion Pipeline Module
+Streaming, batched ingestion for bulk document loads:
+PDFs are parsed in a process pool, pages are split into chunks lazily,
+chunks are embedded in fixed-size batches (optionally across worker
+processes) and written to the vector store in bulk upserts.
+Only a bounded number of batches is ever in flight, so peak memory stays
+flat regardless of corpus size.
+"""
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from rag.embeddings import get_embedding_model
+from rag.backends import upsert_chunks, delete_chunks
+import config
+
+
+# ============================================
+# Worker Process Functions
+# ============================================
+
+_worker_model = None
+
+
+def _parse_pdf(path: str):
+    """Parse one PDF into page Documents (runs in a worker process)."""
+    from langchain_community.document_loaders import PyPDFLoader
+    return PyPDFLoader(path).load()
+
+
+def _init_embedding_worker():
+    """Load the embedding model once per worker process."""
+    global _worker_model
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    from rag.embeddings import create_base_embeddings
+    _worker_model, _ = create_base_embeddings()
+
+
+def _embed_in_worker(texts):
+    """Embed a batch of texts with the worker's model (runs in a worker process)."""
+    return _worker_model.embed_documents(texts)
+
+
+def _process_pool(workers: int, **kwargs) -> ProcessPoolExecutor:
+    # spawn: never fork a parent that may already hold torch/tokenizer threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"), **kwargs)
+
+
+# ============================================
+# Streaming Helpers
+# ============================================
+
+def bounded_map(executor, func, items, window: int):
+    """Like executor.map, but keeps at most `window` tasks in flight."""
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(func, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def iter_pdf_pages(pdf_paths, workers: int):
+    """Yield (path, pages) for each PDF, parsing them in a process pool."""
+    pdf_paths = list(pdf_paths)
+    if workers <= 1 or len(pdf_paths) <= 1:
+        for path in pdf_paths:
+            yield path, _parse_pdf(str(path))
+        return
+
+    with _process_pool(workers) as executor:
+        for path_str, pages in bounded_map(executor, _parse_pdf, (str(p) for p in pdf_paths), workers * 2):
+            yield Path(path_str), pages
+
+
+def iter_chunks(documents, splitter):
+    """Split documents one at a time so only a single page is ever expanded."""
+    for document in documents:
+        yield from splitter.split_documents([document])
+
+
+# ============================================
+# Batched Embedding + Bulk Upsert
+# ============================================
+
+class IngestionPipeline:
+    """
+    Accepts (chunk_id, chunk) pairs and writes them to the vector store.
+
+    Chunks are grouped into EMBEDDING_BATCH_SIZE batches; each batch is
+    embedded either in-process or on a pool of embedding worker processes,
+    and results are flushed to the vector store in UPSERT_BATCH_SIZE bulk upserts.
+    """
+
+    def __init__(self, store, parallel: bool = False):
+        self.store = store
+        self.batch_size = config.EMBEDDING_BATCH_SIZE
+        self.upsert_batch_size = config.UPSERT_BATCH_SIZE
+        self.workers = config.INGEST_WORKERS if parallel else 1
+        self.chunks_written = 0
+        self._batch = []
+        self._in_flight = deque()
+        self._upsert_buffer = []
+        self._executor = None
+        self._start = time.perf_counter()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = _process_pool(
+                self.workers,
+                initializer=_init_embedding_worker
+            )
+        return self._executor
+
+    def add(self, chunk_id: str, chunk):
+        self._batch.append((chunk_id, chunk))
+        if len(self._batch) >= self.batch_size:
+            self._submit_batch()
+
+    def _submit_batch(self):
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+
+        texts = [chunk.page_content for _, chunk in batch]
+        if self.workers > 1:
+            future = self._get_executor().submit(_embed_in_worker, texts)
+            self._in_flight.append((batch, future))
+            # Bound the number of batches held in memory
+            while len(self._in_flight) >= self.workers * 2:
+                self._collect(*self._in_flight.popleft())
+        else:
+            self._buffer(batch, get_embedding_model().embed_documents(texts))
+
+    def _collect(self, batch, future):
+        self._buffer(batch, future.result())
+
+    def _buffer(self, batch, vectors):
+        self._upsert_buffer.extend(zip(batch, vectors))
+        if len(self._upsert_buffer) >= self.upsert_batch_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._upsert_buffer:
+            return
+        rows, self._upsert_buffer = self._upsert_buffer, []
+        upsert_chunks(
+            self.store,
+            ids=[chunk_id for (chunk_id, _), _ in rows],
+            embeddings=[vector for _, vector in rows],
+            documents=[chunk.page_content for (_, chunk), _ in rows],
+            metadatas=[chunk.metadata or {"source": "unknown"} for (_, chunk), _ in rows]
+        )
+        self.chunks_written += len(rows)
+
+    def close(self) -> dict:
+        """Drain all pending work and return throughput stats."""
+        try:
+            self._submit_batch()
+            while self._in_flight:
+                self._collect(*self._in_flight.popleft())
+            self._flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+        elapsed = time.perf_counter() - self._start
+        return {
+            "chunks_embedded": self.chunks_written,
+            "embedding_seconds": round(elapsed, 3),
+            "chunks_per_second": round(self.chunks_written / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+def delete_in_batches(store, ids, batch_size: int = None):
+    """Delete chunk IDs from the store in bulk batches."""
+    batch_size = batch_size or config.UPSERT_BATCH_SIZE
+    ids = list(ids)
+    for i in range(0, len(ids), batch_size):
+        delete_chunks(store, ids[i:i + batch_size])
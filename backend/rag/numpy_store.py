@@ -0,0 +1,356 @@
+"""
+KLU Agent - NumPy Vector Store Module
+In-process vector index for small corpora: one contiguous float32 matrix,
+memory-mapped from disk and searched with a single matrix-vector product
+(embeddings are L2-normalized, so the dot product is cosine similarity).
+Chunk categories are kept as a compact int16 code array for filtering.
+"""
+
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, List, NamedTuple, Optional
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+
+# chunks.json names the array files it belongs to; replacing it commits a persist
+VECTORS_FILENAME = "vectors.npy"         # pre-versioning layout
+CATEGORIES_FILENAME = "categories.npy"
+CHUNKS_FILENAME = "chunks.json"
+NO_CATEGORY = -1
+
+
+class _Snapshot(NamedTuple):
+    """One consistent view of the index; replaced as a whole, never mutated."""
+    ids: list
+    texts: list
+    metadatas: list
+    category_vocab: list
+    vectors: Optional[np.ndarray]   # (n, dim) float32, memmap or in-memory
+    categories: np.ndarray
+    id_index: dict
+
+
+_EMPTY = _Snapshot([], [], [], [], None, np.zeros(0, dtype=np.int16), {})
+
+# Minimum row capacity of the in-memory append buffers
+MIN_CAPACITY = 1024
+
+
+def _append_rows(buffer: Optional[np.ndarray], current: Optional[np.ndarray], added: np.ndarray) -> np.ndarray:
+    """
+    Write `added` after the rows of `current` in a growth buffer whose first
+    rows are `current`, reallocating (capacity x2) only when it is full.
+    Rows past a published snapshot's length are invisible to its readers.
+    """
+    size = len(current) if current is not None else 0
+    if buffer is None or len(buffer) < size + len(added):
+        capacity = max(size + len(added), 2 * size, MIN_CAPACITY)
+        grown = np.empty((capacity,) + added.shape[1:], dtype=added.dtype)
+        if size:
+            grown[:size] = current
+        buffer = grown
+    buffer[size:size + len(added)] = added
+    return buffer
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Flat (exact) vector index backed by .npy files.
+
+    Reads memory-map the matrix, so opening the index is O(1) and pages are
+    shared between processes. Writes (upsert/delete) publish a new snapshot
+    in one attribute swap, so searches running in other threads always see
+    a consistent view; appended rows go into amortized growth buffers, so
+    bulk ingest does not copy the matrix per batch. Call persist() to write
+    them back atomically.
+    """
+
+    def __init__(self, persist_directory: str, embedding_function: Optional[Embeddings] = None):
+        self.persist_directory = Path(persist_directory)
+        self._embedding = embedding_function
+        self._state = _EMPTY
+        # Growth buffers whose first rows are the current snapshot's arrays (None after load/delete)
+        self._vector_buffer = None
+        self._category_buffer = None
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._load()
+
+    # ----- persistence -----
+
+    def _load(self):
+        chunks_path = self.persist_directory / CHUNKS_FILENAME
+        if not chunks_path.exists():
+            return
+        try:
+            with open(chunks_path, "r", encoding="utf-8") as f:
+                chunks = json.load(f)
+            ids = chunks["ids"]
+            vectors = np.load(self.persist_directory / chunks.get("vectors_file", VECTORS_FILENAME), mmap_mode="r")
+            categories = np.load(self.persist_directory / chunks.get("categories_file", CATEGORIES_FILENAME))
+            if not len(ids) == len(chunks["texts"]) == len(categories) == (vectors.shape[0] if len(ids) else 0):
+                raise ValueError(f"{len(ids)} ids, {vectors.shape[0]} vectors, {len(categories)} categories")
+        except (OSError, KeyError, ValueError) as e:
+            # An empty store has no manifest-listed chunks, so the next index run rebuilds it
+            print(f"⚠️ NumPy index at {self.persist_directory} is unreadable or torn ({e}) - starting empty")
+            self._state = _EMPTY
+            self._dirty = True
+        else:
+            self._state = _Snapshot(
+                ids=ids,
+                texts=chunks["texts"],
+                metadatas=chunks["metadatas"],
+                category_vocab=chunks["category_vocab"],
+                vectors=vectors,
+                categories=categories,
+                id_index={chunk_id: i for i, chunk_id in enumerate(ids)}
+            )
+        self._vector_buffer = self._category_buffer = None
+
+    def persist(self):
+        """
+        Write pending changes to disk and re-open the matrix memory-mapped.
+
+        The arrays go to new versioned files first; the single replace of
+        chunks.json that names them is the commit, so a crash leaves either
+        the old index or the new one, never a mix.
+        """
+        with self._write_lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.persist_directory, exist_ok=True)
+            state = self._state
+            version = uuid.uuid4().hex[:12]
+            files = {"vectors_file": f"vectors-{version}.npy", "categories_file": f"categories-{version}.npy"}
+
+            vectors = state.vectors if state.vectors is not None else np.zeros((0, 0), dtype=np.float32)
+            for filename, array in ((files["vectors_file"], vectors), (files["categories_file"], state.categories)):
+                with open(self.persist_directory / filename, "wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            tmp_path = self.persist_directory / f"{CHUNKS_FILENAME}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    **files,
+                    "ids": state.ids,
+                    "texts": state.texts,
+                    "metadatas": state.metadatas,
+                    "category_vocab": state.category_vocab,
+                }, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.persist_directory / CHUNKS_FILENAME)
+
+            # Array files of earlier versions (and of crashed persists)
+            for path in self.persist_directory.glob("*.npy"):
+                if path.name not in files.values():
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass   # still memory-mapped on Windows; removed next time
+
+            self._dirty = False
+            self._load()
+
+    # ----- writes -----
+
+    @staticmethod
+    def _category_code(vocab: list, metadata: dict) -> int:
+        category = (metadata or {}).get("category")
+        if category is None:
+            return NO_CATEGORY
+        if category not in vocab:
+            vocab.append(category)
+        return vocab.index(category)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        """Insert or replace chunks with precomputed embeddings."""
+        new_vectors = np.asarray(embeddings, dtype=np.float32)
+        # The last occurrence of a repeated id wins
+        rows = list({chunk_id: row for row, chunk_id in enumerate(ids)}.values())
+
+        with self._write_lock:
+            state = self._state
+            chunk_ids, texts, metas = list(state.ids), list(state.texts), list(state.metadatas)
+            vocab, id_index = list(state.category_vocab), dict(state.id_index)
+            vectors = state.vectors if len(chunk_ids) else None
+            categories = state.categories
+
+            append_rows, append_codes, replaced = [], [], []
+            for row in rows:
+                chunk_id, text, metadata = ids[row], documents[row], metadatas[row]
+                code = self._category_code(vocab, metadata)
+                existing = id_index.get(chunk_id)
+                if existing is not None:
+                    replaced.append((existing, row, code))
+                    texts[existing] = text
+                    metas[existing] = metadata
+                else:
+                    id_index[chunk_id] = len(chunk_ids)
+                    chunk_ids.append(chunk_id)
+                    texts.append(text)
+                    metas.append(metadata)
+                    append_rows.append(row)
+                    append_codes.append(code)
+
+            if replaced:
+                # Rows readers can see are never written in place: copy on write.
+                # Content-hashed ids make replacements rare.
+                vectors, categories = np.array(vectors), categories.copy()
+                for existing, row, code in replaced:
+                    vectors[existing] = new_vectors[row]
+                    categories[existing] = code
+                self._vector_buffer, self._category_buffer = vectors, categories
+
+            if append_rows:
+                size = len(chunk_ids)
+                self._vector_buffer = _append_rows(self._vector_buffer, vectors, new_vectors[append_rows])
+                self._category_buffer = _append_rows(self._category_buffer, categories,
+                                                     np.asarray(append_codes, dtype=np.int16))
+                vectors, categories = self._vector_buffer[:size], self._category_buffer[:size]
+
+            self._state = _Snapshot(chunk_ids, texts, metas, vocab, vectors, categories, id_index)
+            self._dirty = True
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._write_lock:
+            state = self._state
+            drop = {state.id_index[i] for i in ids if i in state.id_index}
+            if not drop:
+                return False
+            keep = [i for i in range(len(state.ids)) if i not in drop]
+            chunk_ids = [state.ids[i] for i in keep]
+            self._state = _Snapshot(
+                ids=chunk_ids,
+                texts=[state.texts[i] for i in keep],
+                metadatas=[state.metadatas[i] for i in keep],
+                category_vocab=state.category_vocab,
+                vectors=np.array(state.vectors[keep]) if keep else None,
+                categories=state.categories[keep],
+                id_index={chunk_id: i for i, chunk_id in enumerate(chunk_ids)}
+            )
+            self._vector_buffer = self._category_buffer = None
+            self._dirty = True
+            return True
+
+    def reset(self):
+        """Remove every chunk."""
+        with self._write_lock:
+            self._state = _EMPTY
+            self._vector_buffer = self._category_buffer = None
+            self._dirty = True
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(self.count() + i) for i in range(len(texts))]
+        self.upsert(ids, self._embedding.embed_documents(texts), texts, metadatas)
+        self.persist()
+        return ids
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   persist_directory: str = "numpy_index", **kwargs: Any):
+        store = cls(persist_directory=persist_directory, embedding_function=embedding)
+        store.add_texts(texts, metadatas, ids=kwargs.get("ids"))
+        return store
+
+    # ----- reads -----
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+
+    def count(self) -> int:
+        return len(self._state.ids)
+
+    def get_all(self) -> dict:
+        state = self._state
+        return {"ids": list(state.ids), "documents": list(state.texts), "metadatas": list(state.metadatas)}
+
+    @staticmethod
+    def _filter_mask(state: _Snapshot, filter: Optional[dict]):
+        """Boolean row mask for a {"category": value | {"$in": [...]}} filter."""
+        if not filter or "category" not in filter:
+            return None
+        wanted = filter["category"]
+        values = wanted.get("$in", []) if isinstance(wanted, dict) else [wanted]
+        codes = [state.category_vocab.index(v) for v in values if v in state.category_vocab]
+        return np.isin(state.categories, codes)
+
+    def _top_k(self, state: _Snapshot, embedding, k: int, filter: Optional[dict] = None):
+        """Indices and scores of the k most similar rows (one mat-vec product)."""
+        if state.vectors is None or not len(state.ids):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = state.vectors @ np.asarray(embedding, dtype=np.float32)
+        mask = self._filter_mask(state, filter)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        return top, scores[top]
+
+    @staticmethod
+    def _document(state: _Snapshot, i: int) -> Document:
+        return Document(id=state.ids[i], page_content=state.texts[i], metadata=dict(state.metadatas[i] or {}))
+
+    def similarity_search_by_vector_with_scores(self, embedding: List[float], k: int = 4,
+                                                filter: Optional[dict] = None):
+        state = self._state
+        top, scores = self._top_k(state, embedding, k, filter)
+        return [(self._document(state, int(i)), float(s)) for i, s in zip(top, scores)]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None,
+                                    **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_scores(embedding, k, filter)]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                          **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None,
+                                     **kwargs: Any):
+        return self.similarity_search_by_vector_with_scores(self._embedding.embed_query(query), k, filter)
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] -> relevance in [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def max_marginal_relevance_search_by_vector(self, embedding: List[float], k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5, filter: Optional[dict] = None,
+                                                **kwargs: Any) -> List[Document]:
+        state = self._state
+        candidates, relevance = self._top_k(state, embedding, fetch_k, filter)
+        if not len(candidates):
+            return []
+
+        candidate_vectors = np.asarray(state.vectors[candidates])
+        selected = [0]
+        while len(selected) < min(k, len(candidates)):
+            redundancy = (candidate_vectors @ candidate_vectors[selected].T).max(axis=1)
+            mmr = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+            mmr[selected] = -np.inf
+            selected.append(int(np.argmax(mmr)))
+        return [self._document(state, int(candidates[i])) for i in selected]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20,
+                                      lambda_mult: float = 0.5, filter: Optional[dict] = None,
+                                      **kwargs: Any) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._embedding.embed_query(query), k, fetch_k, lambda_mult, filter
+        )
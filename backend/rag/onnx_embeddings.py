@@ -0,0 +1,143 @@
+"""
+KLU Agent - ONNX Embedding Module
+CPU inference for the sentence-transformers embedding model through ONNX
+Runtime with int8 dynamic quantization (EMBEDDING_BACKEND=onnx). The model
+is exported once to ONNX_MODEL_DIR (at startup if missing, or by
+`python -m rag.snapshot`). Texts are embedded in batches sorted by length,
+so each batch pads as little as possible.
+"""
+
+import json
+import shutil
+from pathlib import Path
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+import config
+
+ONNX_MANIFEST = "klu_onnx.json"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+
+
+def _read_manifest(model_dir: Path):
+    try:
+        return json.loads((model_dir / ONNX_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def export_onnx_model(model_dir: str = None) -> str:
+    """Export EMBEDDING_MODEL's transformer to ONNX and quantize its weights to int8."""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from rag.snapshot import model_snapshot_path
+
+    target = Path(model_dir or config.ONNX_MODEL_DIR)
+    staging = target.with_name(target.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    print(f"🔄 Exporting {config.EMBEDDING_MODEL} to ONNX (int8)...")
+    model = SentenceTransformer(model_snapshot_path() or config.EMBEDDING_MODEL, device="cpu")
+    transformer = model[0]
+    pooling = next((module for module in model if type(module).__name__ == "Pooling"), None)
+    transformer.tokenizer.save_pretrained(str(staging))
+
+    sample = transformer.tokenizer(["KL University admissions"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class _Encoder(torch.nn.Module):
+        """Positional-input wrapper returning the token embeddings only."""
+
+        def __init__(self, encoder):
+            super().__init__()
+            self.encoder = encoder
+
+        def forward(self, *inputs):
+            return self.encoder(**dict(zip(input_names, inputs))).last_hidden_state
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(
+            _Encoder(transformer.auto_model.eval()),
+            tuple(sample[name] for name in input_names),
+            str(staging / FP32_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    # Weights to int8, activations quantized on the fly per batch
+    quantize_dynamic(str(staging / FP32_FILE), str(staging / INT8_FILE), weight_type=QuantType.QInt8)
+    (staging / FP32_FILE).unlink()
+
+    (staging / ONNX_MANIFEST).write_text(json.dumps({
+        "model": config.EMBEDDING_MODEL,
+        "pooling": pooling.get_pooling_mode_str() if pooling else "mean",
+        "max_seq_length": model.max_seq_length,
+    }), encoding="utf-8")
+
+    shutil.rmtree(target, ignore_errors=True)
+    staging.rename(target)
+    print(f"✅ ONNX embedding model written to {target}")
+    return str(target)
+
+
+class OnnxEmbeddings(Embeddings):
+    """Quantized ONNX Runtime embeddings matching the sentence-transformers output (normalized)."""
+
+    def __init__(self, model_dir: str, batch_size: int = 64):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        manifest = _read_manifest(model_dir)
+        self.pooling = manifest["pooling"]
+        self.max_seq_length = manifest["max_seq_length"]
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_dir / INT8_FILE), sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    def _run(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(texts, padding=True, truncation=True,
+                                 max_length=self.max_seq_length, return_tensors="np")
+        hidden = self.session.run(None, {name: encoded[name].astype(np.int64) for name in self.input_names})[0]
+
+        if self.pooling == "cls":
+            vectors = hidden[:, 0]
+        else:
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        # Similar lengths per batch keep padding (wasted compute) low
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = [None] * len(texts)
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            for index, vector in zip(indices, self._run([texts[i] for i in indices])):
+                vectors[index] = vector.tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._run([text])[0].tolist()
+
+
+def load_onnx_embeddings() -> OnnxEmbeddings:
+    """Open the exported int8 model, exporting it first if missing or stale."""
+    model_dir = Path(config.ONNX_MODEL_DIR)
+    manifest = _read_manifest(model_dir)
+    if manifest is None or manifest.get("model") != config.EMBEDDING_MODEL:
+        export_onnx_model(str(model_dir))
+    return OnnxEmbeddings(str(model_dir), batch_size=config.EMBEDDING_BATCH_SIZE)
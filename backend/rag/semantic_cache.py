@@ -0,0 +1,148 @@
+"""
+KLU Agent - Semantic Answer Cache Module
+Caches final agent answers keyed on the query embedding, so near-identical
+questions ("hostel fees?", "what is the hostel fee") are answered without
+running the ReAct loop again.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from rag.embeddings import get_embedding_model
+from data.database import get_data_generation
+import config
+
+
+class SemanticCache:
+    """
+    Size-bounded LRU cache of answers with a cosine-similarity lookup.
+
+    Embeddings are L2-normalized (normalize_embeddings=True), so cosine
+    similarity is a plain dot product against the stacked cache keys.
+    """
+
+    def __init__(self, threshold: float, ttl_seconds: float, max_entries: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # entry_id -> (embedding, response, created_at)
+        self._matrix = None            # stacked embeddings, rebuilt lazily
+        self._matrix_ids = []
+        self._next_id = 0
+        self._generation = get_data_generation()
+        self._lock = threading.Lock()
+
+    def _check_generation(self):
+        """Drop everything if the database changed since the entries were stored."""
+        generation = get_data_generation()
+        if generation != self._generation:
+            self._entries.clear()
+            self._matrix = None
+            self._generation = generation
+
+    def _evict_expired(self, now: float):
+        expired = [eid for eid, (_, _, created) in self._entries.items() if now - created > self.ttl_seconds]
+        for eid in expired:
+            del self._entries[eid]
+        if expired:
+            self._matrix = None
+
+    def _get_matrix(self):
+        if self._matrix is None and self._entries:
+            self._matrix_ids = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[eid][0] for eid in self._matrix_ids])
+        return self._matrix
+
+    def embed(self, query: str) -> np.ndarray:
+        """Embed a query with the shared embedding model."""
+        vector = get_embedding_model().embed_query(query.strip())
+        return np.asarray(vector, dtype=np.float32)
+
+    def lookup(self, query: str, embedding: np.ndarray = None):
+        """Return a cached response for a semantically similar query, or None."""
+        if embedding is None:
+            embedding = self.embed(query)
+
+        with self._lock:
+            self._check_generation()
+            self._evict_expired(time.time())
+
+            matrix = self._get_matrix()
+            if matrix is not None:
+                scores = matrix @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = self._matrix_ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return dict(self._entries[entry_id][1])
+
+            self.misses += 1
+            return None
+
+    def store(self, query: str, response: dict, embedding: np.ndarray = None, generation: int = None):
+        """
+        Cache a response under the query's embedding.
+
+        Pass the data generation read before the answer was computed: if the
+        database changed since, the answer may be stale and is not stored.
+        """
+        if embedding is None:
+            embedding = self.embed(query)
+
+        with self._lock:
+            self._check_generation()
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[self._next_id] = (embedding, dict(response), time.time())
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        """Invalidate every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self._entries),
+        }
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    """Get the shared semantic answer cache, or None if disabled."""
+    global _answer_cache
+
+    if not config.SEMANTIC_CACHE_ENABLED:
+        return None
+
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = SemanticCache(
+                    threshold=config.SEMANTIC_CACHE_THRESHOLD,
+                    ttl_seconds=config.SEMANTIC_CACHE_TTL_SECONDS,
+                    max_entries=config.SEMANTIC_CACHE_MAX_ENTRIES
+                )
+
+    return _answer_cache
+
+
+def is_cacheable(result: dict) -> bool:
+    """Only cache answers that came from a successful agent run."""
+    tools_used = result.get("tools_used", [])
+    return bool(tools_used) and not any(t in ("error", "fallback", "RAG-fallback") for t in tools_used)
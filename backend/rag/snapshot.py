@@ -0,0 +1,84 @@
+"""
+KLU Agent - Startup Snapshot Module
+Builds ahead of time (e.g. in the deploy build step) what a cold start
+would otherwise create on its first run:
+1. A local copy of the embedding model (safetensors weights, memory-mapped
+   on load), so startup skips the HF hub lookup and download - plus its
+   int8 ONNX export when EMBEDDING_BACKEND=onnx.
+2. An up-to-date vector index. With VECTOR_BACKEND=numpy the embedding
+   matrix is memory-mapped, so opening it costs almost nothing and startup
+   only re-checks source mtimes against the manifest.
+
+Usage (from backend/):
+    python -m rag.snapshot
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Optional
+import config
+
+SNAPSHOT_MANIFEST = "klu_snapshot.json"
+
+
+def model_snapshot_path() -> Optional[str]:
+    """The embedding model snapshot directory, if one exists for EMBEDDING_MODEL."""
+    if not config.EMBEDDING_SNAPSHOT_DIR:
+        return None
+
+    try:
+        manifest = json.loads((Path(config.EMBEDDING_SNAPSHOT_DIR) / SNAPSHOT_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("model") != config.EMBEDDING_MODEL:
+        print(f"⚠️ Model snapshot is for {manifest.get('model')}, not {config.EMBEDDING_MODEL} - ignoring it")
+        return None
+    return config.EMBEDDING_SNAPSHOT_DIR
+
+
+def save_model_snapshot() -> str:
+    """Download (if needed) and save EMBEDDING_MODEL to EMBEDDING_SNAPSHOT_DIR."""
+    from sentence_transformers import SentenceTransformer
+
+    target = Path(config.EMBEDDING_SNAPSHOT_DIR)
+    staging = target.with_name(target.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+
+    model = SentenceTransformer(config.EMBEDDING_MODEL, device="cpu")
+    model.save(str(staging))
+    (staging / SNAPSHOT_MANIFEST).write_text(
+        json.dumps({"model": config.EMBEDDING_MODEL, "created_at": time.time()}), encoding="utf-8"
+    )
+
+    # Swap in the finished snapshot so a crash never leaves a half-written one
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    return str(target)
+
+
+def build_snapshot():
+    """Write the model snapshot, then bring the vector index up to date with it."""
+    start = time.perf_counter()
+    path = save_model_snapshot()
+    print(f"✅ Embedding model snapshot written to {path} ({time.perf_counter() - start:.1f}s)")
+
+    if config.EMBEDDING_BACKEND == "onnx":
+        from rag.onnx_embeddings import export_onnx_model
+        export_onnx_model()
+
+    from rag import vector_store
+    from rag.backends import index_dir
+    if vector_store.initialize_vector_store() is None:
+        raise SystemExit("❌ Vector index build failed")
+
+    print(f"✅ Vector index ready in {index_dir()} ({vector_store.last_index_stats.get('total_chunks', 0)} chunks)")
+    if config.VECTOR_BACKEND != "numpy":
+        print("💡 Set VECTOR_BACKEND=numpy to memory-map the index at startup")
+
+
+if __name__ == "__main__":
+    build_snapshot()
@@ -1,20 +1,50 @@
 """
 KLU Agent - Vector Store Module
-Manages ChromaDB vector store for document storage and retrieval.
+Manages the vector store (ChromaDB or the in-process NumPy index) for
+document storage and retrieval.
 Handles document ingestion from JSON knowledge base and PDF files.
 """
 
+import hashlib
 import json
 import os
+import threading
+import time
 from pathlib import Path
-from langchain_community.vectorstores import Chroma
+from typing import Any, List, Optional
+from langchain_core.retrievers import BaseRetriever
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from rag.backends import index_dir, open_store, count_chunks, get_all_chunks, reset_store, persist_store
+from rag.ingestion import IngestionPipeline, iter_pdf_pages, iter_chunks, delete_in_batches
+from rag.bm25 import BM25Index
+from rag.categories import GENERAL_CATEGORY, canonical_category, category_values
 from rag.embeddings import get_embedding_model
+from rag.dedup import ChunkDeduplicator
+from metrics import VECTOR_SEARCH_SECONDS
 import config
 
 
 _vector_store = None
+_vector_store_lock = threading.RLock()
+
+# Manifest of indexed sources, stored next to the backend's index data
+MANIFEST_FILENAME = "index_manifest.json"
+# v2: flattened chunks carry canonical categories; v3: deduplicated chunks;
+# v4: dedup within each source only; v5: PDF chunks carry the general category
+MANIFEST_VERSION = 5
+
+# Stats from the most recent indexing run
+last_index_stats = {}
+
+# Keyword index over the same chunks, for hybrid retrieval
+_bm25_index = None
+BM25_FILENAME = "bm25_index.pkl"
+
+
+def _flat_category(key: str) -> str:
+    """Use the structured documents' category names for flattened chunks too."""
+    return canonical_category(key) or key
 
 
 def _flatten_json(data, prefix=""):
@@ -30,7 +60,7 @@ def _flatten_json(data, prefix=""):
                 text = f"Topic: {new_prefix}\nInformation: {value}"
                 documents.append(Document(
                     page_content=text,
-                    metadata={"source": "klu_knowledge_base", "category": prefix.split(" > ")[0] if prefix else key}
+                    metadata={"source": "klu_knowledge_base", "category": _flat_category(prefix.split(" > ")[0] if prefix else key)}
                 ))
     elif isinstance(data, list):
         for i, item in enumerate(data):
@@ -43,7 +73,7 @@ def _flatten_json(data, prefix=""):
                 text = f"Topic: {prefix}\nInformation: {item}"
                 documents.append(Document(
                     page_content=text,
-                    metadata={"source": "klu_knowledge_base", "category": prefix.split(" > ")[0] if prefix else "general"}
+                    metadata={"source": "klu_knowledge_base", "category": _flat_category(prefix.split(" > ")[0] if prefix else "general")}
                 ))
 
     return documents
@@ -292,14 +322,11 @@ General Enquiry: {ci.get('general_enquiry', {}).get('email', '')} | {ci.get('gen
     return documents
 
 
-def load_knowledge_base():
-    """Load KLU knowledge base JSON and create document chunks."""
-    kb_path = Path(config.BASE_DIR) / "knowledge_base" / "klu_data.json"
+KNOWLEDGE_BASE_PATH = Path(config.BASE_DIR) / "knowledge_base" / "klu_data.json"
 
-    if not kb_path.exists():
-        print(f"⚠️ Knowledge base not found at {kb_path}")
-        return []
 
+def _load_knowledge_base_file(kb_path: Path):
+    """Create documents from a KLU knowledge base JSON file."""
     with open(kb_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
@@ -308,8 +335,56 @@ def load_knowledge_base():
 
     # Also add flattened versions for broader coverage
     flat_docs = _flatten_json(data)
+    if config.DEDUP_ENABLED:
+        flat_docs = _drop_covered_facts(documents, flat_docs)
     documents.extend(flat_docs)
 
+    return documents
+
+
+def _drop_covered_facts(structured_docs, flat_docs):
+    """
+    Drop flattened facts whose value already appears verbatim in a structured
+    document of the same category (e.g. a department's HOD or a fee figure).
+    Very short values ("Yes", "4") are kept since they match by accident.
+    """
+    def normalize(text):
+        return " ".join(text.split()).casefold()
+
+    structured_by_category = {}
+    for doc in structured_docs:
+        structured_by_category.setdefault(doc.metadata.get("category"), []).append(normalize(doc.page_content))
+
+    kept = []
+    for doc in flat_docs:
+        value = normalize(doc.page_content.split("\nInformation: ", 1)[-1])
+        covering = structured_by_category.get(doc.metadata.get("category"), [])
+        if len(value) >= 4 and any(value in text for text in covering):
+            continue
+        kept.append(doc)
+
+    print(f"🧹 Skipped {len(flat_docs) - len(kept)} flattened facts already covered by structured documents")
+    return kept
+
+
+def _load_pdf_file(pdf_path: Path):
+    """Load the pages of a single PDF file."""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    print(f"📄 Loading PDF: {pdf_path.name}")
+    return PyPDFLoader(str(pdf_path)).load()
+
+
+def load_knowledge_base():
+    """Load KLU knowledge base JSON and create document chunks."""
+    kb_path = KNOWLEDGE_BASE_PATH
+
+    if not kb_path.exists():
+        print(f"⚠️ Knowledge base not found at {kb_path}")
+        return []
+
+    documents = _load_knowledge_base_file(kb_path)
+
     print(f"📄 Loaded {len(documents)} documents from knowledge base")
     return documents
 
@@ -325,12 +400,8 @@ def load_pdf_documents():
 
     documents = []
     try:
-        from langchain_community.document_loaders import PyPDFLoader
-
-        for pdf_file in docs_dir.glob("*.pdf"):
-            print(f"📄 Loading PDF: {pdf_file.name}")
-            loader = PyPDFLoader(str(pdf_file))
-            documents.extend(loader.load())
+        for pdf_file in sorted(docs_dir.glob("*.pdf")):
+            documents.extend(_load_pdf_file(pdf_file))
     except ImportError:
         print("⚠️ PyPDF not available, skipping PDF loading")
 
@@ -338,82 +409,363 @@ def load_pdf_documents():
     return documents
 
 
-def initialize_vector_store():
-    """Initialize ChromaDB vector store with all documents."""
-    global _vector_store
+# ============================================
+# Incremental Indexing
+# ============================================
 
-    print("🔄 Initializing vector store...")
-
-    # Load all documents
-    all_documents = []
-    all_documents.extend(load_knowledge_base())
-    all_documents.extend(load_pdf_documents())
-
-    if not all_documents:
-        print("⚠️ No documents found to index!")
-        return None
-
-    # Split documents into chunks
-    text_splitter = RecursiveCharacterTextSplitter(
+def _get_text_splitter():
+    return RecursiveCharacterTextSplitter(
         chunk_size=config.CHUNK_SIZE,
         chunk_overlap=config.CHUNK_OVERLAP,
         separators=["\n\n", "\n", ". ", " ", ""]
     )
-    chunks = text_splitter.split_documents(all_documents)
-    print(f"🔪 Split into {len(chunks)} chunks")
-
-    # Get embedding model
-    embedding_model = get_embedding_model()
-
-    # Create ChromaDB vector store
-    _vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embedding_model,
-        persist_directory=config.CHROMA_PERSIST_DIR,
-        collection_name=config.CHROMA_COLLECTION_NAME
-    )
 
-    print(f"✅ Vector store initialized with {len(chunks)} chunks")
-    return _vector_store
 
+def _discover_sources() -> dict:
+    """Map a stable source key to each file that feeds the index."""
+    sources = {}
+    if KNOWLEDGE_BASE_PATH.exists():
+        sources["knowledge_base/klu_data.json"] = (KNOWLEDGE_BASE_PATH, "json")
+
+    docs_dir = Path(config.DOCUMENTS_DIR)
+    if not docs_dir.exists():
+        os.makedirs(docs_dir, exist_ok=True)
+        print(f"📁 Created documents directory at {docs_dir}")
+    for pdf_file in sorted(docs_dir.glob("*.pdf")):
+        sources[f"documents/{pdf_file.name}"] = (pdf_file, "pdf")
+
+    return sources
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-def get_vector_store():
-    """Get the vector store, initializing if needed."""
-    global _vector_store
 
+def _chunk_id(source_key: str, chunk: Document) -> str:
+    """Content-addressed chunk ID: unchanged chunks keep their ID across rebuilds."""
+    payload = "\0".join([
+        source_key,
+        chunk.page_content,
+        json.dumps(chunk.metadata, sort_keys=True, default=str),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _manifest_path() -> Path:
+    return index_dir() / MANIFEST_FILENAME
+
+
+def _load_manifest():
+    """Load the source manifest, or None if missing or unreadable."""
+    path = _manifest_path()
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        # Indexes from before the key was recorded were built with the PyTorch model
+        if manifest.get("embedding", config.EMBEDDING_MODEL) != get_embedding_model().model_name:
+            print("🔄 Embedding model changed since the index was built - re-indexing")
+            return None
+        return manifest
+    except Exception as e:
+        print(f"⚠️ Failed to read index manifest: {e}")
+        return None
+
+
+def _save_manifest(sources: dict):
+    path = _manifest_path()
+    os.makedirs(path.parent, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "embedding": get_embedding_model().model_name,
+                   "sources": sources}, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def initialize_vector_store(force: bool = False):
+    """
+    Bring the vector store in sync with the source files.
+
+    Indexing is incremental: sources whose mtime/size (or content hash) match
+    the manifest are skipped, only chunks with new content-hashed IDs are
+    embedded, and chunks of changed or deleted sources are removed.
+    Changed sources are streamed through the batched IngestionPipeline.
+    Pass force=True to drop the collection and re-index everything.
+    """
+    global _vector_store, last_index_stats
+
+    with _vector_store_lock:
+        print("🔄 Initializing vector store...")
+        start = time.perf_counter()
+
+        store = _vector_store or open_store()
+        manifest = None if force else _load_manifest()
+        if manifest is not None:
+            listed = sum(len(entry.get("chunk_ids", [])) for entry in manifest["sources"].values())
+            if listed != count_chunks(store):
+                # e.g. a torn or lost index next to an intact manifest
+                print(f"🔄 Index holds {count_chunks(store)} chunks but the manifest lists {listed} - re-indexing")
+                manifest = None
+        previous = manifest["sources"] if manifest else {}
+
+        if manifest is None and count_chunks(store) > 0:
+            # No manifest means we can't tell which chunks are ours (e.g. a
+            # collection from before incremental indexing): start clean.
+            print("🧹 Resetting vector store collection")
+            store = reset_store(store)
+
+        stats = {"sources_scanned": 0, "sources_changed": 0, "sources_removed": 0,
+                 "chunks_added": 0, "chunks_removed": 0}
+        current = {}
+        changed = {}  # source_key -> (path, kind, manifest entry)
+
+        # Cheap change detection: mtime/size first, content hash second
+        for source_key, (path, kind) in _discover_sources().items():
+            stats["sources_scanned"] += 1
+            st = path.stat()
+            entry = previous.get(source_key)
+
+            if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+                current[source_key] = entry
+                continue
+
+            digest = _file_sha256(path)
+            if entry and entry["sha256"] == digest:
+                current[source_key] = {**entry, "mtime": st.st_mtime, "size": st.st_size}
+                continue
+
+            changed[source_key] = (path, kind, {"mtime": st.st_mtime, "size": st.st_size, "sha256": digest})
+
+        changed_pdfs = [key for key, (_, kind, _) in changed.items() if kind == "pdf"]
+        pipeline = IngestionPipeline(store, parallel=len(changed_pdfs) >= config.INGEST_PARALLEL_MIN_FILES)
+        splitter = _get_text_splitter()
+        # Dedup stays within one source: each source's manifest entry must list
+        # every chunk it needs, since unchanged sources are never re-read.
+        # Duplicates across sources are dropped at retrieval instead.
+        dedup_stats = {"duplicates_exact": 0, "duplicates_near": 0, "duplicate_tokens_skipped": 0}
+        stale_ids = []
+
+        def consume(source_key, documents):
+            entry = previous.get(source_key)
+            old_ids = set(entry["chunk_ids"]) if entry else set()
+            ids, seen = [], set()
+            deduplicator = ChunkDeduplicator(config.DEDUP_NEAR_THRESHOLD) if config.DEDUP_ENABLED else None
+            for chunk in iter_chunks(documents, splitter):
+                chunk_id = _chunk_id(source_key, chunk)
+                if chunk_id in seen:
+                    continue
+                if deduplicator is not None and deduplicator.check(chunk.page_content):
+                    continue
+                seen.add(chunk_id)
+                ids.append(chunk_id)
+                if chunk_id not in old_ids:
+                    pipeline.add(chunk_id, chunk)
+                    stats["chunks_added"] += 1
+            if deduplicator is not None:
+                for key, value in deduplicator.stats().items():
+                    dedup_stats[key] += value
+            stale_ids.extend(old_ids - seen)
+            stats["sources_changed"] += 1
+            current[source_key] = {**changed[source_key][2], "chunk_ids": ids}
+
+        try:
+            for source_key, (path, kind, _) in changed.items():
+                if kind == "json":
+                    consume(source_key, _load_knowledge_base_file(path))
+
+            if changed_pdfs:
+                keys_by_path = {str(changed[key][0]): key for key in changed_pdfs}
+                try:
+                    pdf_paths = [changed[key][0] for key in changed_pdfs]
+                    for path, pages in iter_pdf_pages(pdf_paths, config.INGEST_WORKERS):
+                        print(f"📄 Loaded PDF: {path.name} ({len(pages)} pages)")
+                        # Prospectus/regulation pages span topics: keep them in every filtered search
+                        for page in pages:
+                            page.metadata.setdefault("category", GENERAL_CATEGORY)
+                        consume(keys_by_path[str(path)], pages)
+                except ImportError:
+                    print("⚠️ PyPDF not available, skipping PDF loading")
+        finally:
+            stats.update(pipeline.close())
+            if config.DEDUP_ENABLED:
+                stats.update(dedup_stats)
+
+        # Sources we could not process keep their previous chunks
+        for source_key in changed:
+            if source_key not in current and source_key in previous:
+                current[source_key] = previous[source_key]
+
+        # Sources that disappeared since the last run
+        for source_key, entry in previous.items():
+            if source_key not in current and source_key not in changed and entry.get("chunk_ids"):
+                stale_ids.extend(entry["chunk_ids"])
+                stats["sources_removed"] += 1
+
+        if stale_ids:
+            delete_in_batches(store, stale_ids)
+        stats["chunks_removed"] = len(stale_ids)
+
+        persist_store(store)
+        _save_manifest(current)
+
+        if config.RETRIEVAL_MODE == "hybrid":
+            index_changed = bool(stats["chunks_added"] or stats["chunks_removed"])
+            _sync_bm25_index(store, rebuild=force or index_changed)
+
+        total = count_chunks(store)
+        stats["total_chunks"] = total
+        stats["seconds"] = round(time.perf_counter() - start, 3)
+        last_index_stats = stats
+
+        if total == 0:
+            print("⚠️ No documents found to index!")
+            _vector_store = None
+            return None
+
+        _vector_store = store
+        print(
+            f"✅ Vector store ready with {total} chunks "
+            f"(+{stats['chunks_added']} / -{stats['chunks_removed']}, "
+            f"{stats['chunks_per_second']} chunks/s, {stats['seconds']}s)"
+        )
+        if config.DEDUP_ENABLED and (stats["duplicates_exact"] or stats["duplicates_near"]):
+            print(
+                f"🧹 Skipped {stats['duplicates_exact']} exact + {stats['duplicates_near']} near-duplicate chunks "
+                f"(~{stats['duplicate_tokens_skipped']} tokens)"
+            )
+        return _vector_store
+
+
+# ============================================
+# Hybrid Retrieval (BM25 + dense, reciprocal rank fusion)
+# ============================================
+
+def _bm25_path() -> str:
+    return str(index_dir() / BM25_FILENAME)
+
+
+def _sync_bm25_index(store, rebuild: bool):
+    """Load the persisted BM25 index, rebuilding it from the collection when stale."""
+    global _bm25_index
+
+    if not rebuild:
+        if _bm25_index is not None:
+            return
+        try:
+            _bm25_index = BM25Index.load(_bm25_path())
+        except Exception as e:
+            print(f"⚠️ Failed to load BM25 index: {e}")
+            _bm25_index = None
+        if _bm25_index is not None:
+            return
+
+    data = get_all_chunks(store)
+    _bm25_index = BM25Index.build(data["ids"], data["documents"], data["metadatas"])
+    _bm25_index.save(_bm25_path())
+    print(f"🔤 BM25 index built over {len(_bm25_index)} chunks")
+
+
+def _fusion_key(doc) -> str:
+    # Content, not IDs: not every Chroma wrapper version returns chunk IDs
+    return doc.page_content
+
+
+def reciprocal_rank_fusion(ranked_lists, k: int, rrf_k: int = 60):
+    """Merge ranked Document lists: score = sum over lists of 1 / (rrf_k + rank)."""
+    scores, docs = {}, {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked, 1):
+            key = _fusion_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            docs.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [docs[key] for key in best]
+
+
+class HybridRetriever(BaseRetriever):
+    """Dense (MMR) + BM25 keyword retrieval merged by reciprocal rank fusion."""
+
+    dense: BaseRetriever
+    bm25: Any
+    k: int = 5
+    candidates: int = 10
+    rrf_k: int = 60
+    category: Optional[str] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        # Pass the callbacks down so the dense search is timed on its own
+        dense_docs = self.dense.invoke(query, config={"callbacks": run_manager.get_child()} if run_manager else None)
+        allowed = None
+        if self.category:
+            values = category_values(self.category)
+            allowed = lambda metadata: metadata.get("category") in values
+        with VECTOR_SEARCH_SECONDS.time(retriever="BM25"):
+            keyword_docs = self.bm25.get_documents(query, self.candidates, allowed)
+        return reciprocal_rank_fusion([dense_docs, keyword_docs], self.k, self.rrf_k)
+
+
+def get_vector_store():
+    """Get the vector store, initializing (incrementally) if needed."""
     if _vector_store is None:
-        # Try loading existing store first
-        if os.path.exists(config.CHROMA_PERSIST_DIR):
-            try:
-                embedding_model = get_embedding_model()
-                _vector_store = Chroma(
-                    persist_directory=config.CHROMA_PERSIST_DIR,
-                    embedding_function=embedding_model,
-                    collection_name=config.CHROMA_COLLECTION_NAME
-                )
-                # Check if it has documents
-                if _vector_store._collection.count() > 0:
-                    print(f"✅ Loaded existing vector store with {_vector_store._collection.count()} documents")
-                    return _vector_store
-            except Exception as e:
-                print(f"⚠️ Failed to load existing vector store: {e}")
-
-        # Initialize fresh
-        _vector_store = initialize_vector_store()
+        with _vector_store_lock:
+            if _vector_store is None:
+                try:
+                    initialize_vector_store()
+                except Exception as e:
+                    print(f"⚠️ Failed to initialize vector store: {e}")
 
     return _vector_store
 
 
-def get_retriever():
-    """Get a retriever from the vector store."""
+def index_building() -> bool:
+    """True while the first index build runs (there is no store to search yet)."""
+    if _vector_store is not None:
+        return False
+    if _vector_store_lock.acquire(blocking=False):
+        _vector_store_lock.release()
+        return False
+    return True
+
+
+def get_dense_retriever(k: int = None, category: str = None):
+    """
+    Get the dense (MMR) retriever from the vector store.
+    With a category, the filter is pushed down into the vector search so
+    MMR's fetch_k candidates all come from that category (plus the
+    uncategorized general chunks, e.g. PDF pages).
+    """
     store = get_vector_store()
     if store is None:
         return None
 
-    return store.as_retriever(
-        search_type="mmr",
-        search_kwargs={
-            "k": config.TOP_K_RESULTS,
-            "fetch_k": config.TOP_K_RESULTS * 3
-        }
-    )
+    k = k or config.TOP_K_RESULTS
+    search_kwargs = {
+        "k": k,
+        "fetch_k": k * 3
+    }
+    if category:
+        search_kwargs["filter"] = {"category": {"$in": category_values(category)}}
+    return store.as_retriever(search_type="mmr", search_kwargs=search_kwargs)
+
+
+def get_retriever(category: str = None):
+    """
+    Get a retriever from the vector store (hybrid when RETRIEVAL_MODE=hybrid),
+    optionally restricted to one knowledge-base category.
+    """
+    category = canonical_category(category)
+    if config.RETRIEVAL_MODE == "hybrid":
+        candidates = config.TOP_K_RESULTS * 2
+        dense = get_dense_retriever(k=candidates, category=category)
+        if dense is not None and _bm25_index is not None:
+            return HybridRetriever(dense=dense, bm25=_bm25_index, k=config.TOP_K_RESULTS,
+                                   candidates=candidates, category=category)
+
+    return get_dense_retriever(category=category)
@@ -0,0 +1,86 @@
+"""
+KLU Agent - Worker Pool Module
+Bounded thread pool for the synchronous parts of the request path
+(SQLAlchemy queries, Chroma searches, embedding calls) so they never
+block the asyncio event loop, plus single-flight coalescing of identical
+concurrent requests.
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def get_worker_pool() -> ThreadPoolExecutor:
+    """Get or create the shared worker pool (singleton pattern)."""
+    global _worker_pool
+
+    if _worker_pool is None:
+        with _worker_pool_lock:
+            if _worker_pool is None:
+                _worker_pool = ThreadPoolExecutor(
+                    max_workers=config.AGENT_WORKER_THREADS,
+                    thread_name_prefix="klu-worker"
+                )
+
+    return _worker_pool
+
+
+async def run_in_worker(func, *args, **kwargs):
+    """Run a blocking callable on the shared worker pool and await its result."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(get_worker_pool(), call)
+
+
+def shutdown_worker_pool():
+    """Shut down the worker pool, waiting for in-flight work to finish."""
+    global _worker_pool
+
+    with _worker_pool_lock:
+        if _worker_pool is not None:
+            _worker_pool.shutdown(wait=True)
+            _worker_pool = None
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key onto one in-flight task.
+
+    The first caller starts the work; callers arriving while it runs await
+    the same task and share its result (or exception). The task is shielded,
+    so a disconnecting caller does not cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._in_flight = {}   # key -> asyncio.Task
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key, func):
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "started": self.started,
+            "coalesced": self.coalesced,
+        }